@@ -0,0 +1,44 @@
+"""create IngestionLog
+
+Revision ID: 4b7d2e9c1a03
+Revises: d815f58f5d4f
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9c1a03'
+down_revision: Union[str, None] = 'd815f58f5d4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_log',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=True),
+    sa.Column('created_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+    # Dates loaded before the log existed are marked as loaded so they
+    # are not downloaded again.
+    op.execute(
+        """
+        INSERT INTO ingestion_log (date, status, rows)
+        SELECT date, 'loaded', count(*)
+        FROM spimex_trading_results
+        GROUP BY date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('ingestion_log')
@@ -0,0 +1,45 @@
+"""unique (date, exchange_product_id) in SpimexTradingResults
+
+Revision ID: 9e3f5a1c7b28
+Revises: 4b7d2e9c1a03
+Create Date: 2026-10-18 11:47:05.602917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3f5a1c7b28'
+down_revision: Union[str, None] = '4b7d2e9c1a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the most recently created copy of rows duplicated by repeated
+    # ingestion runs.
+    op.execute(
+        """
+        DELETE FROM spimex_trading_results a
+        USING spimex_trading_results b
+        WHERE a.date = b.date
+          AND a.exchange_product_id = b.exchange_product_id
+          AND (a.created_on, a.id) < (b.created_on, b.id)
+        """
+    )
+    op.create_unique_constraint(
+        'uq_spimex_trading_results_date_product',
+        'spimex_trading_results',
+        ['date', 'exchange_product_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        'uq_spimex_trading_results_date_product',
+        'spimex_trading_results',
+        type_='unique',
+    )
@@ -0,0 +1,49 @@
+"""add SpimexTradingResults indexes
+
+Revision ID: c2a84f61d9e5
+Revises: 9e3f5a1c7b28
+Create Date: 2026-10-18 13:20:37.114582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a84f61d9e5'
+down_revision: Union[str, None] = '9e3f5a1c7b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_spimex_trading_results_date_brin', ['date'], {'postgresql_using': 'brin'}),
+    ('ix_spimex_trading_results_oil_id_date', ['oil_id', 'date'], {}),
+    ('ix_spimex_trading_results_delivery_basis_id_date', ['delivery_basis_id', 'date'], {}),
+    ('ix_spimex_trading_results_delivery_type_id_date', ['delivery_type_id', 'date'], {}),
+    ('ix_spimex_trading_results_date_created_on', ['date', 'created_on'], {}),
+]
+
+
+def upgrade() -> None:
+    # Build without locking out ingestion on large tables.
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                'spimex_trading_results',
+                columns,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name='spimex_trading_results',
+                postgresql_concurrently=True,
+            )
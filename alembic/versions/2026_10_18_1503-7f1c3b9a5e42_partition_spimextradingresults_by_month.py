@@ -0,0 +1,133 @@
+"""partition SpimexTradingResults by month
+
+Revision ID: 7f1c3b9a5e42
+Revises: c2a84f61d9e5
+Create Date: 2026-10-18 15:03:12.870451
+
+Converts spimex_trading_results to a table range-partitioned by month on
+`date`. Partitions are named spimex_trading_results_yYYYYmMM and created by
+create_spimex_trading_results_partition(day), which ingestion calls before
+writing. An old month can be archived with
+ALTER TABLE spimex_trading_results DETACH PARTITION spimex_trading_results_y2015m01.
+
+Postgres requires the partition key in every unique constraint, so the
+primary key becomes (id, date).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f1c3b9a5e42'
+down_revision: Union[str, None] = 'c2a84f61d9e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = 'spimex_trading_results'
+OLD_TABLE = 'spimex_trading_results_unpartitioned'
+
+INDEXES = [
+    ('ix_spimex_trading_results_date_brin', ['date'], {'postgresql_using': 'brin'}),
+    ('ix_spimex_trading_results_oil_id_date', ['oil_id', 'date'], {}),
+    ('ix_spimex_trading_results_delivery_basis_id_date', ['delivery_basis_id', 'date'], {}),
+    ('ix_spimex_trading_results_delivery_type_id_date', ['delivery_type_id', 'date'], {}),
+    ('ix_spimex_trading_results_date_created_on', ['date', 'created_on'], {}),
+]
+
+CREATE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_spimex_trading_results_partition(day date)
+RETURNS void AS $$
+DECLARE
+    month_start date := date_trunc('month', day)::date;
+    partition_name text := 'spimex_trading_results_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass(partition_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF spimex_trading_results '
+            'FOR VALUES FROM (%L) TO (%L)',
+            partition_name, month_start, (month_start + interval '1 month')::date
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('exchange_product_id', sa.String(), nullable=False),
+        sa.Column('exchange_product_name', sa.String(), nullable=False),
+        sa.Column('oil_id', sa.String(), nullable=False),
+        sa.Column('delivery_basis_id', sa.String(), nullable=False),
+        sa.Column('delivery_basis_name', sa.String(), nullable=False),
+        sa.Column('delivery_type_id', sa.String(), nullable=False),
+        sa.Column('volume', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('created_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+        sa.Column('updated_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+        sa.CheckConstraint('count >= 0', name='check_count_positive'),
+        sa.CheckConstraint('total >= 0', name='check_total_positive'),
+        sa.CheckConstraint('volume >= 0', name='check_volume_positive'),
+        sa.UniqueConstraint('date', 'exchange_product_id', name='uq_spimex_trading_results_date_product'),
+    ]
+
+
+def drop_indexes(table: str) -> None:
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name=table)
+    op.drop_constraint('uq_spimex_trading_results_date_product', table, type_='unique')
+    op.drop_constraint('spimex_trading_results_pkey', table, type_='primary')
+
+
+def create_indexes() -> None:
+    for name, index_columns, kwargs in INDEXES:
+        op.create_index(name, TABLE, index_columns, **kwargs)
+
+
+def upgrade() -> None:
+    op.rename_table(TABLE, OLD_TABLE)
+    drop_indexes(OLD_TABLE)
+
+    op.create_table(
+        TABLE,
+        *columns(),
+        sa.PrimaryKeyConstraint('id', 'date', name='spimex_trading_results_pkey'),
+        postgresql_partition_by='RANGE (date)',
+    )
+    op.execute(CREATE_PARTITION_FUNCTION)
+    op.execute(
+        f"""
+        SELECT create_spimex_trading_results_partition(month::date)
+        FROM (
+            SELECT DISTINCT date_trunc('month', date) AS month FROM {OLD_TABLE}
+            UNION
+            SELECT date_trunc('month', now())
+            UNION
+            SELECT date_trunc('month', now() + interval '1 month')
+        ) AS months
+        """
+    )
+    op.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+    op.drop_table(OLD_TABLE)
+    create_indexes()
+
+
+def downgrade() -> None:
+    op.rename_table(TABLE, OLD_TABLE)
+    drop_indexes(OLD_TABLE)
+
+    op.create_table(
+        TABLE,
+        *columns(),
+        sa.PrimaryKeyConstraint('id', name='spimex_trading_results_pkey'),
+    )
+    op.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+    op.drop_table(OLD_TABLE)
+    op.execute('DROP FUNCTION create_spimex_trading_results_partition(date)')
+    create_indexes()
@@ -0,0 +1,42 @@
+"""keyset pagination index for SpimexTradingResults
+
+Revision ID: e5d09a7b3c16
+Revises: 7f1c3b9a5e42
+Create Date: 2026-10-18 16:41:58.225310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5d09a7b3c16'
+down_revision: Union[str, None] = '7f1c3b9a5e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_spimex_trading_results_date_created_on_id',
+        'spimex_trading_results',
+        ['date', 'created_on', 'id'],
+    )
+    op.drop_index(
+        'ix_spimex_trading_results_date_created_on',
+        table_name='spimex_trading_results',
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_spimex_trading_results_date_created_on',
+        'spimex_trading_results',
+        ['date', 'created_on'],
+    )
+    op.drop_index(
+        'ix_spimex_trading_results_date_created_on_id',
+        table_name='spimex_trading_results',
+    )
@@ -0,0 +1,47 @@
+"""create SpimexDailySummary
+
+Revision ID: a6f2c8d41b97
+Revises: e5d09a7b3c16
+Create Date: 2026-10-18 18:54:12.604931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f2c8d41b97'
+down_revision: Union[str, None] = 'e5d09a7b3c16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('spimex_daily_summary',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('oil_id', sa.String(), nullable=False),
+    sa.Column('delivery_basis_id', sa.String(), nullable=False),
+    sa.Column('delivery_type_id', sa.String(), nullable=False),
+    sa.Column('volume', sa.BigInteger(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'oil_id', 'delivery_basis_id', 'delivery_type_id')
+    )
+    # Summarize the dates loaded so far; ingestion refreshes new ones.
+    op.execute(
+        """
+        INSERT INTO spimex_daily_summary
+            (date, oil_id, delivery_basis_id, delivery_type_id, volume, total, count)
+        SELECT date, oil_id, delivery_basis_id, delivery_type_id,
+               sum(volume), sum(total), sum(count)
+        FROM spimex_trading_results
+        GROUP BY date, oil_id, delivery_basis_id, delivery_type_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('spimex_daily_summary')
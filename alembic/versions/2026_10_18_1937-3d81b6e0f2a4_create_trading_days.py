@@ -0,0 +1,36 @@
+"""create TradingDay
+
+Revision ID: 3d81b6e0f2a4
+Revises: a6f2c8d41b97
+Create Date: 2026-10-18 19:37:05.871442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d81b6e0f2a4'
+down_revision: Union[str, None] = 'a6f2c8d41b97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trading_days',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), server_default=sa.text("TIMEZONE('utc', now())"), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+    op.execute(
+        """
+        INSERT INTO trading_days (date)
+        SELECT DISTINCT date FROM spimex_trading_results
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('trading_days')
@@ -0,0 +1,133 @@
+"""
+Seed synthetic rows into a scratch copy of spimex_trading_results and print
+EXPLAIN ANALYZE timings of the queries SpimexRepository builds, without and
+with the model indexes and the (date, exchange_product_id) unique constraint.
+
+Usage: python -m benchmarks.indexes [rows]
+"""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import MetaData, and_, text
+from sqlalchemy.schema import AddConstraint, DropConstraint
+from sqlalchemy.sql import Select
+
+from src.database.db import async_engine
+from src.models import SpimexTradingResults
+from src.repositories import SpimexRepository
+from src.utils.warmer import make_filters
+
+SCHEMA = "bench"
+UNIQUE = "uq_spimex_trading_results_date_product"
+
+SEED = """
+    INSERT INTO {table} (
+        id, exchange_product_id, exchange_product_name, oil_id,
+        delivery_basis_id, delivery_basis_name, delivery_type_id,
+        volume, total, count, date
+    )
+    SELECT
+        gen_random_uuid(),
+        'A' || lpad((i % 500)::text, 3, '0') || 'B' || lpad((i % 40)::text, 2, '0')
+            || chr(65 + i % 6) || '-' || i,
+        'Product',
+        'A' || lpad((i % 500)::text, 3, '0'),
+        'B' || lpad((i % 40)::text, 2, '0'),
+        'Basis',
+        chr(65 + i % 6),
+        i % 1000,
+        i % 100000,
+        i % 50,
+        date '2015-01-01' + (i / {rows_per_day})::int
+    FROM generate_series(0, {rows} - 1) AS i
+"""
+
+
+async def build_queries(latest: date) -> dict[str, Select]:
+    """
+    Build the first page of the latest trading results, an unpaginated
+    quarter of dynamics and a page of dynamics by product prefix the way the
+    repository does, ordered by (date, created_on, id).
+    """
+    repository = SpimexRepository(session=None)
+    model = repository.model
+    quarter = and_(model.date >= latest - timedelta(days=90), model.date <= latest)
+    shapes = {
+        "trading-results": (
+            model.date == latest,
+            make_filters(oil_id=["A042"], page=0),
+        ),
+        "dynamics": (
+            quarter,
+            make_filters(delivery_basis_id=["B07"], delivery_type_id=["F"]),
+        ),
+        "dynamics-by-product": (
+            quarter,
+            make_filters(exchange_product_id=["A042B02"], page=0),
+        ),
+    }
+    queries = {}
+    for name, (where, filters) in shapes.items():
+        query = repository._select_schema().where(where)
+        query = await repository._apply_filters(query, filters)
+        queries[name] = repository._order(repository._paginate(query, filters))
+    return queries
+
+
+async def explain(conn, queries: dict[str, Select]) -> dict[str, str]:
+    timings = {}
+    for name, query in queries.items():
+        sql = query.compile(
+            dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+        )
+        result = await conn.execute(text(f"EXPLAIN ANALYZE {sql}"))
+        plan = [row[0] for row in result]
+        timings[name] = next(line for line in plan if "Execution Time" in line)
+    return timings
+
+
+async def run(rows_num: int) -> None:
+    table = SpimexTradingResults.__table__.to_metadata(MetaData(), schema=SCHEMA)
+    table_name = f"{SCHEMA}.{table.name}"
+    unique = next(
+        constraint for constraint in table.constraints if constraint.name == UNIQUE
+    )
+
+    async with async_engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+        await conn.run_sync(lambda sync_conn: table.create(sync_conn))
+        for index in table.indexes:
+            await conn.run_sync(lambda sync_conn: index.drop(sync_conn))
+        await conn.execute(DropConstraint(unique))
+        await conn.execute(
+            text(SEED.format(table=table_name, rows=rows_num, rows_per_day=2000))
+        )
+        await conn.execute(text(f"ANALYZE {table_name}"))
+        latest = await conn.scalar(text(f"SELECT max(date) FROM {table_name}"))
+
+    queries = await build_queries(latest)
+    try:
+        async with async_engine.begin() as conn:
+            # The repository's queries name the table without a schema.
+            await conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+            before = await explain(conn, queries)
+            for index in table.indexes:
+                await conn.run_sync(lambda sync_conn: index.create(sync_conn))
+            await conn.execute(AddConstraint(unique))
+            await conn.execute(text(f"ANALYZE {table_name}"))
+            after = await explain(conn, queries)
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+    print(f"rows: {rows_num}")
+    for name in queries:
+        print(f"{name}:")
+        print(f"  before: {before[name]}")
+        print(f"  after:  {after[name]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 3_000_000))
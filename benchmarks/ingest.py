@@ -0,0 +1,84 @@
+"""
+Compare ORM, bulk and upsert write throughput of SpimexRepository.
+
+Usage: python -m benchmarks.ingest [rows]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import delete
+
+from src.database.db import async_session_maker
+from src.models import SpimexTradingResults
+from src.repositories import SpimexRepository
+
+BENCH_DATE = date(1970, 1, 1)
+
+
+def make_rows(rows_num: int) -> list[dict]:
+    return [
+        {
+            "exchange_product_id": f"A{i:03d}BDK060C",
+            "exchange_product_name": f"Product {i}",
+            "oil_id": f"A{i % 1000:03d}",
+            "delivery_basis_id": "BDK",
+            "delivery_basis_name": "Basis",
+            "delivery_type_id": "C",
+            "volume": i,
+            "total": i * 10,
+            "count": 1,
+            "date": BENCH_DATE,
+        }
+        for i in range(rows_num)
+    ]
+
+
+async def cleanup() -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            delete(SpimexTradingResults).where(SpimexTradingResults.date == BENCH_DATE)
+        )
+        await session.commit()
+
+
+async def run(rows_num: int) -> None:
+    async with async_session_maker() as session:
+        repository = SpimexRepository(session)
+
+        await cleanup()
+        started = time.perf_counter()
+        await repository.save_all(
+            [SpimexTradingResults(**row) for row in make_rows(rows_num)]
+        )
+        orm_elapsed = time.perf_counter() - started
+
+        await cleanup()
+        started = time.perf_counter()
+        await repository.bulk_save(make_rows(rows_num))
+        bulk_elapsed = time.perf_counter() - started
+
+        await cleanup()
+        started = time.perf_counter()
+        await repository.upsert_all(
+            make_rows(rows_num),
+            index_elements=["date", "exchange_product_id"],
+            batch_size=1000,
+        )
+        upsert_elapsed = time.perf_counter() - started
+
+    await cleanup()
+
+    print(f"rows: {rows_num}")
+    for name, elapsed in [
+        ("orm", orm_elapsed),
+        ("bulk", bulk_elapsed),
+        ("upsert", upsert_elapsed),
+    ]:
+        print(f"{name + ':':<8}{rows_num / elapsed:>12,.0f} rows/sec ({elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -0,0 +1,75 @@
+"""
+Measure the per-row cost of building and serializing a /dynamics response
+with ORM hydration plus double validation and with the lean read path,
+which encodes plain rows once, taking the best of three runs of each.
+
+Usage: python -m benchmarks.reads [rows]
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy import select
+
+from benchmarks.ingest import BENCH_DATE, cleanup, make_rows
+from src.database.db import async_session_maker
+from src.main import app
+from src.models import SpimexTradingResults
+from src.repositories import SpimexRepository
+from src.schemas import TradingResultsList
+from src.utils.encoders import ORJSONCoder
+from src.utils.warmer import make_filters
+
+FILTERS = make_filters()
+
+
+async def orm_response(repository: SpimexRepository) -> Response:
+    repository.session.expunge_all()
+    result = await repository.session.execute(
+        select(SpimexTradingResults).where(SpimexTradingResults.date == BENCH_DATE)
+    )
+    rows = [trading.to_pydantic_schema() for trading in result.scalars().all()]
+    route = next(route for route in app.routes if route.path == "/api/v1/dynamics")
+    content = await serialize_response(
+        field=route.response_field,
+        response_content=TradingResultsList(playload=rows),
+        is_coroutine=True,
+    )
+    return JSONResponse(content)
+
+
+async def lean_response(repository: SpimexRepository) -> Response:
+    rows = await repository.get_dynamics(BENCH_DATE, BENCH_DATE, FILTERS)
+    content = ORJSONCoder.encode({"playload": rows, "next_cursor": None})
+    return Response(content=content, media_type="application/json")
+
+
+async def respond(build, repository: SpimexRepository) -> float:
+    started = time.perf_counter()
+    await build(repository)
+    return time.perf_counter() - started
+
+
+async def run(rows_num: int) -> None:
+    await cleanup()
+    async with async_session_maker() as session:
+        repository = SpimexRepository(session)
+        await repository.bulk_save(make_rows(rows_num))
+
+        orm_elapsed = min([await respond(orm_response, repository) for _ in range(3)])
+        lean_elapsed = min([await respond(lean_response, repository) for _ in range(3)])
+    await cleanup()
+
+    print(f"rows: {rows_num}")
+    for name, elapsed in [("orm", orm_elapsed), ("lean", lean_elapsed)]:
+        print(
+            f"{name + ':':<6}{elapsed * 1e6 / rows_num:>8.1f} us/row ({elapsed:.3f}s)"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
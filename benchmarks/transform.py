@@ -0,0 +1,73 @@
+"""
+Measure the XLS parse and row transform stages on a synthetic bulletin.
+
+Usage: python -m benchmarks.transform [rows]
+"""
+
+import sys
+import time
+from datetime import date
+from io import BytesIO
+
+import pandas as pd
+
+from src.repositories import SpimexRepository
+
+
+def make_sheet(rows_num: int) -> BytesIO:
+    df = pd.DataFrame(
+        {
+            "Column 1": ["-"] * rows_num,
+            "Column 2": [f"A{i % 1000:03d}BDK060C" for i in range(rows_num)],
+            "Column 3": [f"Product {i}" for i in range(rows_num)],
+            "Column 4": ["Basis"] * rows_num,
+            "Column 5": [str(i) for i in range(rows_num)],
+            "Column 6": [str(i * 10) for i in range(rows_num)],
+            "Column 7": ["-"] * rows_num,
+            "Column 8": [str(i % 5 + 1) for i in range(rows_num)],
+        }
+    )
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        df.to_excel(writer, index=False, startrow=6)
+    buffer.seek(0)
+    return buffer
+
+
+def iterrows_transform(df: pd.DataFrame, trading_date: date) -> list[dict]:
+    return [
+        row.to_dict()
+        | {
+            "oil_id": row["exchange_product_id"][:4],
+            "delivery_basis_id": row["exchange_product_id"][4:7],
+            "delivery_type_id": row["exchange_product_id"][-1],
+            "date": trading_date,
+        }
+        for _, row in df.iterrows()
+    ]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def run(rows_num: int) -> None:
+    repository = SpimexRepository(session=None)
+    sheet = make_sheet(rows_num)
+    trading_date = date(2024, 10, 1)
+
+    df, parse_elapsed = timed(repository._get_necessary_data, sheet)
+    _, iterrows_elapsed = timed(iterrows_transform, df, trading_date)
+    _, vectorized_elapsed = timed(repository._prepare_rows, df, trading_date)
+
+    print(f"rows:       {len(df)}")
+    print(f"read_excel: {parse_elapsed:.4f}s")
+    print(f"iterrows:   {iterrows_elapsed:.4f}s")
+    print(f"vectorized: {vectorized_elapsed:.4f}s")
+    print(f"speedup:    {iterrows_elapsed / vectorized_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
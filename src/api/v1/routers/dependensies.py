@@ -1,8 +1,10 @@
-from fastapi import Depends
+from fastapi import BackgroundTasks, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_async_session
-from src.repositories import SpimexRepository
+from src.repositories import DailySummaryRepository, SpimexRepository
+from src.schemas import TradingFilters
+from src.utils.warmer import record_access
 
 
 async def get_spimex_repository(session: AsyncSession = Depends(get_async_session)):
@@ -10,3 +12,24 @@ async def get_spimex_repository(session: AsyncSession = Depends(get_async_sessio
     Provide a SpimexRepository instance.
     """
     return SpimexRepository(session=session)
+
+
+async def get_daily_summary_repository(
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Provide a DailySummaryRepository instance.
+    """
+    return DailySummaryRepository(session=session)
+
+
+async def get_trading_filters(
+    background_tasks: BackgroundTasks,
+    filters: TradingFilters = Depends(TradingFilters),
+) -> TradingFilters:
+    """
+    Provide the trading filters, counted in the access stats once the
+    response is sent.
+    """
+    background_tasks.add_task(record_access, filters)
+    return filters
@@ -1,19 +1,42 @@
 import logging
-from datetime import date
-from typing import TYPE_CHECKING
+from collections.abc import AsyncIterator
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_cache.decorator import cache
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from fastapi_cache import FastAPICache
 from pydantic import UUID4
 
-from src.repositories import SpimexRepository
+from src.repositories import DailySummaryRepository, SpimexRepository
 from src.config import settings
 
-from src.api.v1.routers.dependensies import get_spimex_repository
+from src.api.v1.routers.dependensies import (
+    get_daily_summary_repository,
+    get_spimex_repository,
+    get_trading_filters,
+)
+from src.utils.cache import cache
+from src.utils.encoders import csv_chunks, ndjson_chunks
+from src.utils.reference_index import reference_index
+from src.utils.tiered_cache import TieredBackend
+from src.utils.warmer import warm_cache
 from src.schemas import (
     TradingResultsSchema,
     LastTradingResultsDates,
     TradingResultsList,
+    TradingResultsBatch,
+    DailySummaryList,
+    ReferenceItem,
+    ReferenceList,
     TradingFilters,
 )
 
@@ -25,20 +48,26 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
 
 @router.get("/", status_code=200)
 async def save_spimex_trading_results(
     date: date,
+    background_tasks: BackgroundTasks,
     spimex_repo: SpimexRepository = Depends(get_spimex_repository),
-) -> None:
+) -> dict[str, float]:
 
-    return await spimex_repo.save_to_db(date)
+    timings = await spimex_repo.save_to_db(date)
+    if timings["loaded"]:
+        background_tasks.add_task(warm_cache)
+    return timings
 
 
 @router.get(
     "/last-trading-days", status_code=200, response_model=LastTradingResultsDates
 )
-@cache(expire=settings.redis.EXPIRE)
+@cache(expire=settings.redis.EXPIRE, max_stale=settings.redis.MAX_STALE)
 async def get_trading_days(
     days: int,
     spimex_repo: SpimexRepository = Depends(get_spimex_repository),
@@ -48,30 +77,174 @@ async def get_trading_days(
     return LastTradingResultsDates(dates=result)
 
 
+def get_last_update(content: dict[str, Any]) -> datetime | None:
+    """
+    Return the newest updated_on among the rows of a response.
+    """
+    return max((row["updated_on"] for row in content["playload"]), default=None)
+
+
 @router.get("/trading-results", status_code=200, response_model=TradingResultsList)
-@cache(expire=settings.redis.EXPIRE)
+@cache(
+    expire=settings.redis.EXPIRE,
+    coalesce=True,
+    lock_timeout=settings.redis.LOCK_TIMEOUT,
+    max_stale=settings.redis.MAX_STALE,
+    etag=True,
+    last_modified=get_last_update,
+)
 async def get_trading_results(
-    sp_filters: TradingFilters = Depends(TradingFilters),
+    sp_filters: TradingFilters = Depends(get_trading_filters),
     spimex_repo: SpimexRepository = Depends(get_spimex_repository),
 ):
     logger.info("Fetching data from the database (trading-results)")
     result = await spimex_repo.get_trading_results(sp_filters)
-    return TradingResultsList(playload=result)
+    return {"playload": result, "next_cursor": sp_filters.next_cursor(result)}
+
+
+def get_stream_format(request: Request) -> str | None:
+    """
+    Return the streaming format requested via `format` or the Accept header.
+    """
+    format = request.query_params.get("format")
+    if format in STREAM_MEDIA_TYPES:
+        return format
+    if STREAM_MEDIA_TYPES["ndjson"] in request.headers.get("accept", ""):
+        return "ndjson"
+    return None
 
 
 @router.get("/dynamics", status_code=200, response_model=TradingResultsList)
-@cache(expire=settings.redis.EXPIRE)
+@cache(
+    expire=settings.redis.EXPIRE,
+    bypass=get_stream_format,
+    coalesce=True,
+    lock_timeout=settings.redis.LOCK_TIMEOUT,
+    etag=True,
+    last_modified=get_last_update,
+)
 async def get_dynamics(
+    request: Request,
     start: date,
     end: date,
-    sp_filters: TradingFilters = Depends(TradingFilters),
+    format: Literal["json", "ndjson", "csv"] = "json",
+    sp_filters: TradingFilters = Depends(get_trading_filters),
     spimex_repo: SpimexRepository = Depends(get_spimex_repository),
 ):
+    if stream_format := get_stream_format(request):
+        logger.info(f"Streaming data from the database (dynamics, {stream_format})")
+        return StreamingResponse(
+            stream_dynamics(spimex_repo, start, end, sp_filters, stream_format),
+            media_type=STREAM_MEDIA_TYPES[stream_format],
+        )
+
     logger.info("Fetching data from the database (dynamics)")
     result = await spimex_repo.get_dynamics(
         start_date=start, end_date=end, filters=sp_filters
     )
-    return TradingResultsList(playload=result)
+    return {"playload": result, "next_cursor": sp_filters.next_cursor(result)}
+
+
+@router.get("/dynamics/summary", status_code=200, response_model=DailySummaryList)
+@cache(
+    expire=settings.redis.EXPIRE,
+    coalesce=True,
+    lock_timeout=settings.redis.LOCK_TIMEOUT,
+    etag=True,
+    last_modified=get_last_update,
+)
+async def get_dynamics_summary(
+    start: date,
+    end: date,
+    sp_filters: TradingFilters = Depends(get_trading_filters),
+    summary_repo: DailySummaryRepository = Depends(get_daily_summary_repository),
+):
+    """
+    Volume, total and count summed per day and oil/delivery basis/delivery
+    type, read from the pre-aggregated daily summary. Volume and total
+    bounds apply to the sums. It's paginated by page only, as its rows have
+    no keyset.
+    """
+    if sp_filters.exchange_product_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The summary can't be filtered by exchange_product_id",
+        )
+    if sp_filters.cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The summary can't be paginated by cursor",
+        )
+    logger.info("Fetching data from the database (dynamics summary)")
+    result = await summary_repo.get_summary(
+        start_date=start, end_date=end, filters=sp_filters
+    )
+    return {"playload": result}
+
+
+async def stream_dynamics(
+    spimex_repo: SpimexRepository,
+    start: date,
+    end: date,
+    sp_filters: TradingFilters,
+    stream_format: str,
+) -> AsyncIterator[bytes]:
+    # The request session is closed before the response body is sent, so the
+    # stream reopens it and releases the connection once it's done.
+    try:
+        partitions = spimex_repo.stream_dynamics(
+            start_date=start, end_date=end, filters=sp_filters
+        )
+        if stream_format == "csv":
+            chunks = csv_chunks(partitions, list(TradingResultsSchema.model_fields))
+        else:
+            chunks = ndjson_chunks(partitions)
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await spimex_repo.session.close()
+
+
+@router.get("/reference/{kind}", status_code=200, response_model=ReferenceList)
+async def get_reference_data(
+    kind: Literal["oil-ids", "delivery-bases", "products"],
+    prefix: str = "",
+    limit: int = Query(100, ge=1, le=1000),
+    spimex_repo: SpimexRepository = Depends(get_spimex_repository),
+):
+    """
+    Distinct oil ids, delivery bases or products starting with `prefix`,
+    served from the in-process reference index. The database is read only
+    once new dates were ingested.
+    """
+    await reference_index.refresh(spimex_repo.get_reference_data)
+    items = reference_index.search(kind.replace("-", "_"), prefix, limit)
+    return ReferenceList(
+        playload=[ReferenceItem(id=id, name=name) for id, name in items]
+    )
+
+
+@router.get("/cache-stats", status_code=200)
+async def get_cache_stats() -> dict[str, dict[str, int]]:
+    """
+    Hit and miss counters of each cache tier in this process.
+    """
+    backend = FastAPICache.get_backend()
+    return backend.stats() if isinstance(backend, TieredBackend) else {}
+
+
+@router.get("/batch", status_code=200, response_model=TradingResultsBatch)
+@cache(expire=settings.redis.EXPIRE)
+async def get_spimex_trading_results_batch(
+    ids: list[UUID4] = Query(max_length=settings.api.BATCH_MAX_IDS),
+    spimex_repo: SpimexRepository = Depends(get_spimex_repository),
+):
+    """
+    Look up to API_BATCH_MAX_IDS trading results by id in one query,
+    listing the ids that weren't found.
+    """
+    result, missing = await spimex_repo.get_tradings(list(dict.fromkeys(ids)))
+    return TradingResultsBatch(playload=result, missing=missing)
 
 
 @router.get("/{id}", status_code=200, response_model=TradingResultsSchema)
@@ -34,12 +34,56 @@ class RedisSettings(BaseSettings):
     HOST: str
     PORT: str
     EXPIRE: int
+    LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_EXPIRE: int = 60
+    LOCK_TIMEOUT: int = 30
+    MAX_STALE: int = 60 * 60
 
     model_config = SettingsConfigDict(
         env_prefix="REDIS_", extra="ignore", env_file=".dev.env"
     )
 
 
+class IngestSettings(BaseSettings):
+
+    QUEUE_SIZE: int = 4
+    SPILL_SIZE: int = 0
+    UPSERT_BATCH_SIZE: int = 1000
+    DOWNLOAD_CONCURRENCY: int = 8
+    PARSE_PROCESSES: int = 2
+    DOWNLOAD_RETRIES: int = 3
+    DOWNLOAD_BACKOFF: float = 0.5
+    DOWNLOAD_TIMEOUT: float = 10
+
+    model_config = SettingsConfigDict(
+        env_prefix="INGEST_", extra="ignore", env_file=".dev.env"
+    )
+
+
+class ApiSettings(BaseSettings):
+
+    STREAM_BATCH_SIZE: int = 1000
+    RECENT_DAYS: int = 30
+    BATCH_MAX_IDS: int = 100
+
+    model_config = SettingsConfigDict(
+        env_prefix="API_", extra="ignore", env_file=".dev.env"
+    )
+
+
+class WarmSettings(BaseSettings):
+
+    CONCURRENCY: int = 4
+    TOP_FILTERS: int = 10
+    ACCESS_DAYS: int = 7
+    TRADING_DAYS: list[int] = [10]
+    DYNAMICS_DAYS: list[int] = [7, 30]
+
+    model_config = SettingsConfigDict(
+        env_prefix="WARM_", extra="ignore", env_file=".dev.env"
+    )
+
+
 class LoggingSettings(BaseSettings):
 
     def configure_logging(self):
@@ -75,6 +119,9 @@ class LoggingSettings(BaseSettings):
 class Settings(BaseSettings):
     db: DatabaseSettings = DatabaseSettings()
     redis: RedisSettings = RedisSettings()
+    ingest: IngestSettings = IngestSettings()
+    api: ApiSettings = ApiSettings()
+    warm: WarmSettings = WarmSettings()
     log: LoggingSettings = LoggingSettings()
 
 
@@ -2,8 +2,13 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from src.api import router
+from src.database.db import async_session_maker
+from src.repositories import SpimexRepository
+from src.repositories.spimex_trading import shutdown_parse_pool
+from src.utils.reference_index import reference_index
 from src.utils.redis import init_redis_cache
 from src.config import settings
 
@@ -15,10 +20,20 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Init FastAPI cache")
-    init_redis_cache()
+    backend = init_redis_cache()
+    await backend.start()
+    logger.info("Build the reference index")
+    try:
+        async with async_session_maker() as session:
+            await reference_index.refresh(SpimexRepository(session).get_reference_data)
+    except Exception:
+        # Built on the first lookup instead.
+        logger.warning("Error building the reference index", exc_info=True)
     yield
+    await backend.stop()
+    shutdown_parse_pool()
 
 
-app = FastAPI(title="Spimex", lifespan=lifespan)
+app = FastAPI(title="Spimex", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(router, prefix="/api")
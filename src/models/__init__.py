@@ -1,7 +1,14 @@
 __all__ = [
     "Base",
     "SpimexTradingResults",
+    "SpimexDailySummary",
+    "TradingDay",
+    "IngestionLog",
+    "IngestionStatus",
 ]
 
 from src.models.base import Base
 from src.models.spimexs_trading import SpimexTradingResults
+from src.models.daily_summary import SpimexDailySummary
+from src.models.trading_day import TradingDay
+from src.models.ingestion_log import IngestionLog, IngestionStatus
@@ -0,0 +1,29 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models import Base
+from src.utils.custom_types import updated_on
+
+
+class SpimexDailySummary(Base):
+    """
+    Trading results summed per day and oil/delivery basis/delivery type,
+    refreshed for each ingested date.
+    """
+
+    __tablename__ = "spimex_daily_summary"
+
+    __table_args__ = (
+        PrimaryKeyConstraint("date", "oil_id", "delivery_basis_id", "delivery_type_id"),
+    )
+
+    date: Mapped[date]
+    oil_id: Mapped[str]
+    delivery_basis_id: Mapped[str]
+    delivery_type_id: Mapped[str]
+    volume: Mapped[int] = mapped_column(BigInteger)
+    total: Mapped[int] = mapped_column(BigInteger)
+    count: Mapped[int] = mapped_column(BigInteger)
+    updated_on: Mapped[updated_on]
@@ -0,0 +1,28 @@
+from datetime import date
+from enum import StrEnum
+
+from sqlalchemy import PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models import Base
+from src.utils.custom_types import created_on, updated_on
+
+
+class IngestionStatus(StrEnum):
+    LOADED = "loaded"
+    NO_DATA = "no_data"
+    FAILED = "failed"
+
+
+class IngestionLog(Base):
+
+    __tablename__ = "ingestion_log"
+
+    __table_args__ = (PrimaryKeyConstraint("date"),)
+
+    date: Mapped[date]
+    status: Mapped[str] = mapped_column(String(16))
+    rows: Mapped[int] = mapped_column(default=0)
+    checksum: Mapped[str | None] = mapped_column(String(64))
+    created_on: Mapped[created_on]
+    updated_on: Mapped[updated_on]
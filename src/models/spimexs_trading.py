@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped
 
 from src.models import Base
@@ -16,6 +16,24 @@ class SpimexTradingResults(Base):
         CheckConstraint("volume >= 0", name="check_volume_positive"),
         CheckConstraint("total >= 0", name="check_total_positive"),
         CheckConstraint("count >= 0", name="check_count_positive"),
+        UniqueConstraint(
+            "date", "exchange_product_id", name="uq_spimex_trading_results_date_product"
+        ),
+        Index("ix_spimex_trading_results_date_brin", "date", postgresql_using="brin"),
+        Index("ix_spimex_trading_results_oil_id_date", "oil_id", "date"),
+        Index(
+            "ix_spimex_trading_results_delivery_basis_id_date",
+            "delivery_basis_id",
+            "date",
+        ),
+        Index(
+            "ix_spimex_trading_results_delivery_type_id_date",
+            "delivery_type_id",
+            "date",
+        ),
+        Index(
+            "ix_spimex_trading_results_date_created_on_id", "date", "created_on", "id"
+        ),
     )
 
     id: Mapped[uuid_pk]
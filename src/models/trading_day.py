@@ -0,0 +1,17 @@
+from datetime import date
+
+from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy.orm import Mapped
+
+from src.models import Base
+from src.utils.custom_types import created_on
+
+
+class TradingDay(Base):
+
+    __tablename__ = "trading_days"
+
+    __table_args__ = (PrimaryKeyConstraint("date"),)
+
+    date: Mapped[date]
+    created_on: Mapped[created_on]
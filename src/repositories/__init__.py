@@ -1,5 +1,11 @@
 __all__ = [
     "SpimexRepository",
+    "IngestionLogRepository",
+    "DailySummaryRepository",
+    "TradingDayRepository",
 ]
 
 from src.repositories.spimex_trading import SpimexRepository
+from src.repositories.ingestion_log import IngestionLogRepository
+from src.repositories.daily_summary import DailySummaryRepository
+from src.repositories.trading_day import TradingDayRepository
@@ -0,0 +1,62 @@
+from datetime import date
+
+from typing import Any
+
+from sqlalchemy import and_, delete, func, insert, select
+
+from src.models import SpimexDailySummary, SpimexTradingResults
+from src.schemas import DailySummarySchema, TradingFilters
+from src.utils.repository import SqlAlchemyRepository
+
+GROUP_BY = ("date", "oil_id", "delivery_basis_id", "delivery_type_id")
+METRICS = ("volume", "total", "count")
+
+
+class DailySummaryRepository(SqlAlchemyRepository):
+
+    model = SpimexDailySummary
+
+    async def get_summary(
+        self, start_date: date, end_date: date, filters: TradingFilters
+    ) -> list[dict[str, Any]]:
+        table = self.model.__table__
+        query = select(*(table.c[name] for name in DailySummarySchema.model_fields))
+        query = query.where(
+            and_(self.model.date >= start_date, self.model.date <= end_date)
+        )
+        for column in ("oil_id", "delivery_type_id", "delivery_basis_id"):
+            if values := getattr(filters, column):
+                query = query.where(table.c[column].in_(values))
+        for column, (low, high) in filters.ranges.items():
+            if low is not None:
+                query = query.where(table.c[column] >= low)
+            if high is not None:
+                query = query.where(table.c[column] <= high)
+        query = query.order_by(
+            self.model.date.desc(), *(table.c[name] for name in GROUP_BY[1:])
+        )
+
+        res = await self.session.execute(
+            query.limit(filters.limit).offset(filters.offset)
+        )
+        return [row._asdict() for row in res.all()]
+
+    async def refresh(self, dates: list[date]) -> None:
+        """
+        Recompute the summary rows of `dates` from the trading results in one
+        transaction.
+        """
+        trading = SpimexTradingResults.__table__
+        await self.session.execute(delete(self.model).where(self.model.date.in_(dates)))
+        await self.session.execute(
+            insert(self.model).from_select(
+                [*GROUP_BY, *METRICS],
+                select(
+                    *(trading.c[name] for name in GROUP_BY),
+                    *(func.sum(trading.c[name]) for name in METRICS),
+                )
+                .where(trading.c.date.in_(dates))
+                .group_by(*(trading.c[name] for name in GROUP_BY)),
+            )
+        )
+        await self.session.commit()
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+
+from sqlalchemy import select, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models import IngestionLog, IngestionStatus
+from src.utils.custom_types import dt_now_utc_sql
+from src.utils.repository import SqlAlchemyRepository
+
+
+class IngestionLogRepository(SqlAlchemyRepository):
+
+    model = IngestionLog
+
+    async def get_completed_dates(self, dates: list[date]) -> set[date]:
+        """
+        Return dates that don't need to be fetched again: loaded ones and past
+        days without a bulletin. Today's bulletin may not be published yet.
+        """
+        today = datetime.now().date()
+        result = await self.session.execute(
+            select(self.model.date).where(
+                and_(
+                    self.model.date.in_(dates),
+                    or_(
+                        self.model.status == IngestionStatus.LOADED,
+                        and_(
+                            self.model.status == IngestionStatus.NO_DATA,
+                            self.model.date < today,
+                        ),
+                    ),
+                )
+            )
+        )
+        return set(result.scalars().all())
+
+    async def record(self, entry: dict) -> None:
+        """
+        Upsert a date's ingestion status without committing.
+        """
+        query = insert(self.model).values(**entry)
+        query = query.on_conflict_do_update(
+            index_elements=[self.model.date],
+            set_={
+                "status": query.excluded.status,
+                "rows": query.excluded.rows,
+                "checksum": query.excluded.checksum,
+                "updated_on": dt_now_utc_sql,
+            },
+        )
+        await self.session.execute(query)
@@ -1,19 +1,73 @@
 import asyncio
-import os
+import hashlib
+import logging
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, date, timedelta
-from typing import TYPE_CHECKING
+from io import BytesIO
+from multiprocessing import get_context
+from typing import IO, Any
+from uuid import UUID
 
 import pandas as pd
 from fastapi import Query
-from sqlalchemy import select, and_
-from httpx import AsyncClient
+from sqlalchemy import select, and_, or_, func, null, text, tuple_, RowMapping
 
-from src.models import SpimexTradingResults
-from src.schemas import TradingFilters
+from src.config import settings
+from src.models import SpimexTradingResults, IngestionStatus
+from src.repositories.daily_summary import DailySummaryRepository
+from src.repositories.trading_day import TradingDayRepository
+from src.repositories.ingestion_log import IngestionLogRepository
+from src.schemas import TradingFilters, TradingResultsSchema
+from src.utils.cache import bump_data_version
+from src.utils.downloader import SpimexDownloader
+from src.utils.reference_index import reference_index
 from src.utils.repository import SqlAlchemyRepository
+from src.utils.trading_days import recent_trading_days
 
-if TYPE_CHECKING:
-    from collections.abc import Sequence
+logger = logging.getLogger(__name__)
+
+_parse_pool: ProcessPoolExecutor | None = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool bulletins are parsed in, started on first use.
+    xlrd holds the GIL while parsing, so a thread would stall the event loop.
+
+    Workers are spawned rather than forked from the running, threaded app.
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ProcessPoolExecutor(
+            settings.ingest.PARSE_PROCESSES, mp_context=get_context("spawn")
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """
+    Stop the parse pool, if started. The next parse starts a new one.
+    """
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+
+def next_prefix(prefix: str) -> str | None:
+    """
+    Return the smallest string greater than every string starting with
+    `prefix`, or None when there is none.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
 
 
 class SpimexRepository(SqlAlchemyRepository):
@@ -24,77 +78,331 @@ class SpimexRepository(SqlAlchemyRepository):
         res = await self.get_by_id(id)
         return res
 
+    async def get_tradings(
+        self, ids: list[UUID]
+    ) -> tuple[list[SpimexTradingResults], list[UUID]]:
+        """
+        Return the trading results with the given ids and the ids not found.
+        """
+        res = await self.get_by_ids(ids)
+        found = {trading.id for trading in res}
+        return list(res), [id for id in ids if id not in found]
+
     async def get_last_trading_dates(self, days_num: int) -> list[date]:
-        res = await self.get_grouped_query_with_limit(self.model.date, days_num)
-        return res
+        """
+        Read the latest trading days from the trading days table, through an
+        in-process copy of the most recent ones.
+        """
+        trading_days = TradingDayRepository(self.session)
+        return await recent_trading_days.get(days_num, trading_days.get_last)
 
-    async def get_trading_results(self, filters: TradingFilters) -> list[dict]:
-        last_trading_date = await self.get_orderly_query_with_limit(self.model.date, 1)
+    async def get_trading_results(
+        self, filters: TradingFilters
+    ) -> list[dict[str, Any]]:
+        last_trading_date = await self.get_last_trading_dates(1)
 
-        query = select(self.model).where(self.model.date == last_trading_date[0])
+        query = self._select_schema().where(self.model.date == last_trading_date[0])
         query = await self._apply_filters(query, filters)
 
-        return await self._execute_and_fetch(
-            query.limit(filters.limit).offset(filters.offset)
-        )
+        return await self._execute_and_fetch(self._paginate(query, filters))
 
     async def get_dynamics(
         self, start_date: date, end_date: date, filters: TradingFilters
-    ) -> list[dict]:
-        query = select(self.model).where(
+    ) -> list[dict[str, Any]]:
+        query = self._select_schema().where(
             and_(self.model.date >= start_date, self.model.date <= end_date)
         )
 
         query = await self._apply_filters(query, filters)
 
-        return await self._execute_and_fetch(
-            query.limit(filters.limit).offset(filters.offset)
+        return await self._execute_and_fetch(self._paginate(query, filters))
+
+    async def stream_dynamics(
+        self, start_date: date, end_date: date, filters: TradingFilters
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """
+        Yield dynamics rows in partitions of API_STREAM_BATCH_SIZE read
+        through a server-side cursor, so memory doesn't grow with the range.
+        """
+        query = self._select_schema().where(
+            and_(self.model.date >= start_date, self.model.date <= end_date)
+        )
+        query = await self._apply_filters(query, filters)
+        query = self._order(self._paginate(query, filters))
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=settings.api.STREAM_BATCH_SIZE)
         )
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    async def get_reference_data(
+        self, id_column: str, name_column: str | None, dates: list[date] | None
+    ) -> list[tuple[str, str | None]]:
+        """
+        Return the distinct values of `id_column` with a name from
+        `name_column`, over `dates` or the whole table.
+        """
+        table = self.model.__table__
+        name = func.max(table.c[name_column]) if name_column else null()
+        query = select(table.c[id_column], name).group_by(table.c[id_column])
+        if dates is not None:
+            query = query.where(self.model.date.in_(dates))
+
+        res = await self.session.execute(query)
+        return [tuple(row) for row in res.all()]
 
     async def _apply_filters(self, query: Query, filters: TradingFilters) -> Query:
+        """
+        Compile the filters into IN, prefix and range predicates, so that a
+        single query serves any number of values.
+
+        A prefix becomes a range over exchange_product_id, which the
+        (date, exchange_product_id) index can serve, unlike a LIKE with a
+        bound pattern; the LIKE is kept to recheck the matches.
+        """
         filters_dict = {
             self.model.oil_id: filters.oil_id,
             self.model.delivery_type_id: filters.delivery_type_id,
             self.model.delivery_basis_id: filters.delivery_basis_id,
         }
 
-        for column, value in filters_dict.items():
-            if value:
-                query = query.filter(column == value)
+        for column, values in filters_dict.items():
+            if values:
+                query = query.filter(column.in_(values))
+
+        if prefixes := filters.exchange_product_id:
+            query = query.filter(
+                or_(*(self._prefix_predicate(prefix) for prefix in prefixes))
+            )
+
+        for name, (low, high) in filters.ranges.items():
+            if low is not None:
+                query = query.filter(getattr(self.model, name) >= low)
+            if high is not None:
+                query = query.filter(getattr(self.model, name) <= high)
 
         return query
 
-    async def _execute_and_fetch(self, query: Query) -> list[dict]:
-        res = await self.session.execute(query.order_by(self.model.created_on.desc()))
-        results: Sequence[self.model] = res.scalars().all()
-        return [trading.to_pydantic_schema() for trading in results]
+    def _prefix_predicate(self, prefix: str):
+        column = self.model.exchange_product_id
+        predicates = [column >= prefix, column.startswith(prefix, autoescape=True)]
+        if (end := next_prefix(prefix)) is not None:
+            predicates.append(column < end)
+        return and_(*predicates)
+
+    def _paginate(self, query: Query, filters: TradingFilters) -> Query:
+        """
+        Apply keyset or offset pagination over the (date, created_on, id)
+        ordering.
+        """
+        if filters.keyset:
+            query = query.where(
+                tuple_(self.model.date, self.model.created_on, self.model.id)
+                < tuple_(*filters.keyset)
+            )
+        return query.limit(filters.limit).offset(filters.offset)
+
+    def _select_schema(self) -> Query:
+        """
+        Select only the TradingResultsSchema columns, skipping ORM hydration.
+        """
+        table = self.model.__table__
+        return select(*(table.c[name] for name in TradingResultsSchema.model_fields))
 
-    async def save_to_db(self, date: date) -> None:
+    def _order(self, query: Query) -> Query:
+        return query.order_by(
+            self.model.date.desc(),
+            self.model.created_on.desc(),
+            self.model.id.desc(),
+        )
+
+    async def _execute_and_fetch(self, query: Query) -> list[dict[str, Any]]:
+        """
+        Return the rows as plain dicts, without hydrating ORM objects or
+        validating them: the columns are constrained by the table already.
+        """
+        res = await self.session.execute(self._order(query))
+        return [row._asdict() for row in res.all()]
+
+    async def save_to_db(self, date: date) -> dict[str, float]:
+        """
+        Download, parse and insert SPIMEX bulletins as an overlapping pipeline.
+
+        Dates already loaded, or known to have no bulletin, are skipped
+        according to the ingestion log. Rows are upserted on
+        (date, exchange_product_id), so re-running ingestion is idempotent.
+
+        The daily summary of the loaded dates is refreshed afterwards.
+
+        Returns per-stage timings: wall time of the download stage, busy time
+        of the parse and insert stages and total wall time, along with the
+        number of dates loaded.
+        """
+        started = time.perf_counter()
+        timings = dict.fromkeys(("download", "parse", "insert"), 0.0)
+        parse_queue = asyncio.Queue(maxsize=settings.ingest.QUEUE_SIZE)
+        insert_queue = asyncio.Queue(maxsize=settings.ingest.QUEUE_SIZE)
+        dates = await self._get_pending_dates(date)
+        await self._ensure_partitions(dates)
+        loaded = []
+
+        async with SpimexDownloader() as downloader:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(
+                    self._download_stage(dates, downloader, parse_queue, timings)
+                )
+                group.create_task(self._parse_stage(parse_queue, insert_queue, timings))
+                group.create_task(self._insert_stage(insert_queue, loaded, timings))
+
+        if loaded:
+            await DailySummaryRepository(self.session).refresh(loaded)
+            await bump_data_version(loaded)
+            recent_trading_days.invalidate()
+        timings["total"] = time.perf_counter() - started
+        timings["loaded"] = len(loaded)
+        return dict(timings)
+
+    async def _get_pending_dates(self, date: date) -> list[date]:
         dates = self._get_dates(date)
-        try:
-            async with AsyncClient() as client:
-                tasks = [self._download_and_save(date, client) for date in dates]
-                await asyncio.gather(*tasks)
-        except Exception as e:
-            print(f"Error while download: {e}!")
-
-        for date in dates:
-            if os.path.exists(f"{date}_spimex_data.xls"):
-                prepared_obj = []
-                df_data = self._get_necessary_data(f"{date}_spimex_data.xls")
-                for _, row in df_data.iterrows():
-                    obj = self.model(
-                        **row.to_dict()
-                        | {
-                            "oil_id": row["exchange_product_id"][:4],
-                            "delivery_basis_id": row["exchange_product_id"][4:7],
-                            "delivery_type_id": row["exchange_product_id"][-1],
-                            "date": date,
-                        }
-                    )
-                    prepared_obj.append(obj)
-                await self.save_all(prepared_obj)
-                os.remove(f"{date}_spimex_data.xls")
+        completed = await IngestionLogRepository(self.session).get_completed_dates(
+            dates
+        )
+        return [date for date in dates if date not in completed]
+
+    async def _ensure_partitions(self, dates: list[date]) -> None:
+        """
+        Create the monthly partitions `dates` will be written to, if the table
+        is partitioned.
+        """
+        partitioned = await self.session.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:table))"
+            ),
+            {"table": self.model.__tablename__},
+        )
+        if not partitioned:
+            return
+
+        for month in sorted({date.replace(day=1) for date in dates}):
+            await self.session.execute(
+                text("SELECT create_spimex_trading_results_partition(:day)"),
+                {"day": month},
+            )
+        await self.session.commit()
+
+    async def _download_stage(
+        self,
+        dates: list[date],
+        downloader: SpimexDownloader,
+        parse_queue: asyncio.Queue,
+        timings: dict[str, float],
+    ) -> None:
+        started = time.perf_counter()
+        pending = iter(dates)
+
+        async def download(date: date) -> None:
+            result = await downloader.download(date)
+            entry = {
+                "date": date,
+                "status": IngestionStatus.NO_DATA,
+                "rows": 0,
+                "checksum": None,
+            }
+            file = None
+            if not result.ok:
+                logger.error(f"Error while download {date}: {result.error}!")
+                entry["status"] = IngestionStatus.FAILED
+            elif result.content is not None:
+                entry["checksum"] = hashlib.sha256(result.content).hexdigest()
+                file = self._buffer(result.content)
+            await parse_queue.put((entry, file))
+
+        # A fixed pool of workers, each taking the next date only once the
+        # parse stage accepted its last file, so that at most
+        # DOWNLOAD_CONCURRENCY payloads wait on a full queue.
+        async def worker() -> None:
+            for date in pending:
+                await download(date)
+
+        await asyncio.gather(
+            *(worker() for _ in range(settings.ingest.DOWNLOAD_CONCURRENCY))
+        )
+        await parse_queue.put(None)
+        timings["download"] = time.perf_counter() - started
+
+    async def _parse_stage(
+        self,
+        parse_queue: asyncio.Queue,
+        insert_queue: asyncio.Queue,
+        timings: dict[str, float],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while (item := await parse_queue.get()) is not None:
+            entry, file = item
+            rows = []
+            if file is not None:
+                started = time.perf_counter()
+                # Spilled payloads are read by the worker from their file.
+                source = file.getvalue() if isinstance(file, BytesIO) else file.name
+                try:
+                    with file:
+                        rows = await loop.run_in_executor(
+                            get_parse_pool(), self._parse_file, entry["date"], source
+                        )
+                except BrokenProcessPool as e:
+                    logger.error(f"Parse worker died on {entry['date']}: {e}!")
+                    entry["status"] = IngestionStatus.FAILED
+                    shutdown_parse_pool()
+                except Exception as e:
+                    logger.error(f"Error while parsing {entry['date']}: {e}!")
+                    entry["status"] = IngestionStatus.FAILED
+                else:
+                    entry["status"] = IngestionStatus.LOADED
+                    entry["rows"] = len(rows)
+                finally:
+                    timings["parse"] += time.perf_counter() - started
+            await insert_queue.put((entry, rows))
+        await insert_queue.put(None)
+
+    async def _insert_stage(
+        self,
+        insert_queue: asyncio.Queue,
+        loaded: list[date],
+        timings: dict[str, float],
+    ) -> None:
+        """
+        Write rows together with their ingestion log entry in one transaction,
+        collecting the dates whose rows were committed into `loaded`.
+        """
+        ingestion_log = IngestionLogRepository(self.session)
+        trading_days = TradingDayRepository(self.session)
+        while (item := await insert_queue.get()) is not None:
+            entry, rows = item
+            started = time.perf_counter()
+            await ingestion_log.record(entry)
+            if rows:
+                await trading_days.record(entry["date"])
+                await self.upsert_all(
+                    rows,
+                    index_elements=["date", "exchange_product_id"],
+                    batch_size=settings.ingest.UPSERT_BATCH_SIZE,
+                )
+                reference_index.update_rows(rows)
+                loaded.append(entry["date"])
+            else:
+                await self.session.commit()
+            timings["insert"] += time.perf_counter() - started
+
+    @staticmethod
+    def _parse_file(date: date, source: bytes | str) -> list[dict]:
+        """
+        Parse a bulletin given as its content or as the path it spilled to.
+        """
+        file = BytesIO(source) if isinstance(source, bytes) else source
+        df_data = SpimexRepository._get_necessary_data(file)
+        return SpimexRepository._prepare_rows(df_data, date)
 
     def _get_dates(self, date: date) -> list[date]:
         dates = []
@@ -104,14 +412,38 @@ class SpimexRepository(SqlAlchemyRepository):
             today -= timedelta(days=1)
         return dates
 
-    async def _download_and_save(self, date: datetime, client: AsyncClient) -> None:
-        url = f"https://spimex.com/upload/reports/oil_xls/oil_xls_{date.strftime('%Y%m%d')}162000.xls"
-        response = await client.get(url=url, timeout=5)
-        if response.status_code == 200:
-            with open(f"{date}_spimex_data.xls", "wb") as file:
-                file.write(response.content)
+    def _buffer(self, content: bytes) -> IO[bytes]:
+        """
+        Keep the payload in memory, spilling it to a named temporary file,
+        removed once closed, when it exceeds INGEST_SPILL_SIZE.
+        """
+        spill_size = settings.ingest.SPILL_SIZE
+        if not spill_size or len(content) <= spill_size:
+            return BytesIO(content)
+
+        file = tempfile.NamedTemporaryFile()
+        file.write(content)
+        file.seek(0)
+        return file
+
+    @staticmethod
+    def _prepare_rows(df: pd.DataFrame, date: date) -> list[dict]:
+        df = df.drop_duplicates("exchange_product_id", keep="last")
+        product_id = df["exchange_product_id"].str
+        df = df.assign(
+            oil_id=product_id[:4],
+            delivery_basis_id=product_id[4:7],
+            delivery_type_id=product_id[-1],
+            date=date,
+        )
+        columns = df.columns.tolist()
+        return [
+            dict(zip(columns, values))
+            for values in zip(*(df[column].tolist() for column in columns))
+        ]
 
-    def _get_necessary_data(self, file: str) -> pd.DataFrame:
+    @staticmethod
+    def _get_necessary_data(file: str | IO[bytes]) -> pd.DataFrame:
         columns_names = [
             "exchange_product_id",
             "exchange_product_name",
@@ -0,0 +1,22 @@
+from datetime import date
+
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models import TradingDay
+from src.utils.repository import SqlAlchemyRepository
+
+
+class TradingDayRepository(SqlAlchemyRepository):
+
+    model = TradingDay
+
+    async def get_last(self, days_num: int) -> list[date]:
+        res = await self.get_orderly_query_with_limit(self.model.date, days_num)
+        return list(res)
+
+    async def record(self, date: date) -> None:
+        """
+        Record a day with trading results without committing.
+        """
+        query = insert(self.model).values(date=date)
+        await self.session.execute(query.on_conflict_do_nothing())
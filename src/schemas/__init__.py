@@ -2,6 +2,11 @@ __all__ = [
     "TradingResultsSchema",
     "LastTradingResultsDates",
     "TradingResultsList",
+    "TradingResultsBatch",
+    "DailySummarySchema",
+    "DailySummaryList",
+    "ReferenceItem",
+    "ReferenceList",
     "TradingFilters",
 ]
 
@@ -9,5 +14,10 @@ from src.schemas.spimex_trading import (
     TradingResultsSchema,
     LastTradingResultsDates,
     TradingResultsList,
+    TradingResultsBatch,
+    DailySummarySchema,
+    DailySummaryList,
+    ReferenceItem,
+    ReferenceList,
     TradingFilters,
 )
@@ -1,17 +1,70 @@
-from dataclasses import dataclass
+import base64
+import json
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from typing import Any
+from uuid import UUID
 
-from fastapi import Query
+from fastapi import HTTPException, Query, status
 
 
 @dataclass
 class BaseFilter:
     page: int | None = Query(default=None)
     per_page: int = Query(ge=1, le=100, default=100)
+    cursor: str | None = Query(default=None)
+
+    def __post_init__(self):
+        self.keyset = self.decode_cursor(self.cursor) if self.cursor else None
 
     @property
     def offset(self) -> int:
-        return self.page * self.per_page if self.page else 0
+        return self.page * self.per_page if self.page and not self.cursor else 0
 
     @property
     def limit(self) -> int | None:
-        return self.per_page if self.page is not None else None
+        paginated = self.page is not None or self.cursor is not None
+        return self.per_page if paginated else None
+
+    def query_params(self) -> dict[str, Any]:
+        """
+        The effective query: set filters plus resolved pagination, so that
+        equivalent requests (e.g. a per_page without a page) compare equal.
+        """
+        params = {
+            field.name: getattr(self, field.name)
+            for field in fields(self)
+            if field.name not in ("page", "per_page", "cursor")
+            and getattr(self, field.name) is not None
+        }
+        params.update(limit=self.limit, offset=self.offset, cursor=self.cursor)
+        return params
+
+    def next_cursor(self, rows: list[Any]) -> str | None:
+        """
+        Build the cursor of the page following `rows`, ordered by
+        (date, created_on, id) descending.
+        """
+        if self.limit is None or len(rows) < self.limit:
+            return None
+        last = rows[-1]
+        keyset = [
+            last["date"].isoformat(),
+            last["created_on"].isoformat(),
+            str(last["id"]),
+        ]
+        return base64.urlsafe_b64encode(json.dumps(keyset).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[date, datetime, UUID]:
+        try:
+            day, created_on, id = json.loads(base64.urlsafe_b64decode(cursor))
+            return (
+                date.fromisoformat(day),
+                datetime.fromisoformat(created_on),
+                UUID(id),
+            )
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
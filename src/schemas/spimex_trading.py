@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import date, datetime
+from uuid import UUID
 
 from fastapi import Query
 from pydantic import BaseModel, Field
@@ -8,6 +9,7 @@ from src.schemas.filter import BaseFilter
 
 
 class TradingResultsSchema(BaseModel):
+    id: UUID
     exchange_product_id: str
     exchange_product_name: str
     oil_id: str
@@ -31,10 +33,69 @@ class LastTradingResultsDates(BaseModel):
 
 class TradingResultsList(BaseModel):
     playload: list[TradingResultsSchema]
+    next_cursor: str | None = None
+
+
+class TradingResultsBatch(BaseModel):
+    playload: list[TradingResultsSchema]
+    missing: list[UUID]
+
+
+class ReferenceItem(BaseModel):
+    id: str
+    name: str | None = None
+
+
+class ReferenceList(BaseModel):
+    playload: list[ReferenceItem]
+
+
+class DailySummarySchema(BaseModel):
+    date: date
+    oil_id: str
+    delivery_basis_id: str
+    delivery_type_id: str
+    volume: int
+    total: int
+    count: int
+    updated_on: datetime
+
+
+class DailySummaryList(BaseModel):
+    playload: list[DailySummarySchema]
+
+
+MULTI_VALUE_FILTERS = (
+    "oil_id",
+    "delivery_type_id",
+    "delivery_basis_id",
+    "exchange_product_id",
+)
 
 
 @dataclass
 class TradingFilters(BaseFilter):
-    oil_id: str | None = Query(None)
-    delivery_type_id: str | None = Query(None)
-    delivery_basis_id: str | None = Query(None)
+    oil_id: list[str] | None = Query(None)
+    delivery_type_id: list[str] | None = Query(None)
+    delivery_basis_id: list[str] | None = Query(None)
+    exchange_product_id: list[str] | None = Query(
+        None, description="exchange_product_id prefixes"
+    )
+    volume_min: int | None = Query(None, ge=0)
+    volume_max: int | None = Query(None, ge=0)
+    total_min: int | None = Query(None, ge=0)
+    total_max: int | None = Query(None, ge=0)
+
+    def __post_init__(self):
+        super().__post_init__()
+        # Sorted and deduplicated, so that reordered values compare equal.
+        for name in MULTI_VALUE_FILTERS:
+            if isinstance(values := getattr(self, name), list):
+                setattr(self, name, sorted(set(values)))
+
+    @property
+    def ranges(self) -> dict[str, tuple[int | None, int | None]]:
+        return {
+            "volume": (self.volume_min, self.volume_max),
+            "total": (self.total_min, self.total_max),
+        }
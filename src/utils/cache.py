@@ -0,0 +1,596 @@
+import asyncio
+import hashlib
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Awaitable, Iterable
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+from inspect import Parameter, isawaitable, signature
+from typing import Any, Callable
+
+import orjson
+from fastapi import BackgroundTasks, Request, Response
+from fastapi.params import Depends
+from fastapi_cache import FastAPICache
+from fastapi_cache.decorator import cache as fastapi_cache
+from redis.exceptions import LockError
+from starlette.background import BackgroundTask
+
+from src.config import settings
+from src.schemas.filter import BaseFilter
+from src.utils.encoders import ORJSONCoder
+from src.utils.repository import SqlAlchemyRepository
+
+logger = logging.getLogger(__name__)
+
+# Outside the cache prefix, so that clearing the cache keeps the versions.
+DATA_VERSIONS_KEY = "spimex:data-versions"
+
+# Bump every date to the next value of a sequence kept under the empty
+# field, in one step, so that concurrent ingests don't lose each other's
+# bumps and the latest version of any range of dates always grows.
+BUMP_DATA_VERSIONS = """
+local version = redis.call('HINCRBY', KEYS[1], '', 1)
+for _, day in ipairs(ARGV) do
+    redis.call('HSET', KEYS[1], day, version)
+end
+return version
+"""
+
+_flights: dict[str, asyncio.Event] = {}
+_revalidations: dict[str, float] = {}
+# Results computed by the endpoint during the current cached call.
+_computed: ContextVar[list[Any] | None] = ContextVar("computed", default=None)
+# Key of the current cached call, built once per request.
+_key: ContextVar[str | None] = ContextVar("key", default=None)
+_warming: ContextVar[bool] = ContextVar("warming", default=False)
+
+# Injected into cached endpoints, so that revalidations run next to the
+# background tasks of the request's dependencies rather than replacing them.
+_injected_background_tasks = Parameter(
+    "__cache_background_tasks", Parameter.KEYWORD_ONLY, annotation=BackgroundTasks
+)
+
+
+class DataVersions:
+    """
+    This process's copy of the version of each trading date changed by
+    ingestion, keyed by its ISO format.
+
+    Every bump takes the next value of one sequence, so the latest version
+    of all dates is the sequence itself. While the cache backend listens
+    for invalidations, the copy is reloaded only after a bump published by
+    any process; otherwise reads first compare the sequence with one HGET.
+    Without Redis, the versions only live in this process.
+    """
+
+    def __init__(self):
+        self._versions: dict[str, int] = {}
+        self._days: list[str] = []
+        self._latest = 0
+        self._loaded = False
+        self._generation = 0
+
+    def invalidate(self, namespace: str | None = None, key: str | None = None) -> None:
+        """
+        Reload the copy on the next read after a bump, or after a full
+        invalidation, e.g. when invalidations may have been missed.
+        """
+        if namespace is None and key in (None, DATA_VERSIONS_KEY):
+            self._loaded = False
+            self._generation += 1
+
+    async def get(self) -> dict[str, int]:
+        await self._refresh()
+        return dict(self._versions)
+
+    async def latest(self, days: list[date] | None = None) -> int:
+        """
+        Return the latest version among dates between the earliest and latest
+        of `days`, or among all dates when the query isn't bounded by dates.
+        """
+        await self._refresh()
+        if not days:
+            return self._latest
+        start = bisect_left(self._days, min(days).isoformat())
+        end = bisect_right(self._days, max(days).isoformat())
+        return max((self._versions[day] for day in self._days[start:end]), default=0)
+
+    async def bump(self, dates: Iterable[date]) -> None:
+        days = [day.isoformat() for day in dates]
+        if not days:
+            return
+        backend = FastAPICache.get_backend()
+        redis = getattr(backend, "redis", None)
+        if redis is None:
+            self._update(dict.fromkeys(days, self._latest + 1))
+            return
+        await redis.eval(BUMP_DATA_VERSIONS, 1, DATA_VERSIONS_KEY, *days)
+        self.invalidate(key=DATA_VERSIONS_KEY)
+        if (publish := getattr(backend, "publish", None)) is not None:
+            await publish(key=DATA_VERSIONS_KEY)
+
+    async def _refresh(self) -> None:
+        generation = self._generation
+        try:
+            backend = FastAPICache.get_backend()
+            redis = getattr(backend, "redis", None)
+            if redis is None or (self._loaded and getattr(backend, "listening", False)):
+                return
+            if self._loaded:
+                latest = await redis.hget(DATA_VERSIONS_KEY, "")
+                if int(latest or 0) == self._latest:
+                    return
+            versions = await redis.hgetall(DATA_VERSIONS_KEY)
+        except Exception:
+            logger.warning("Error retrieving the data versions", exc_info=True)
+            return
+        self._versions, self._days = {}, []
+        self._update({day.decode(): int(version) for day, version in versions.items()})
+        # A bump published while loading may not be included yet.
+        self._loaded = generation == self._generation
+
+    def _update(self, versions: dict[str, int]) -> None:
+        # The sequence itself is kept under the empty field.
+        self._latest = max(versions.pop("", 0), self._latest, *versions.values())
+        added = versions.keys() - self._versions.keys()
+        self._versions.update(versions)
+        if added:
+            self._days = sorted(self._versions)
+
+
+data_versions = DataVersions()
+
+
+async def get_data_versions() -> dict[str, int]:
+    return await data_versions.get()
+
+
+async def get_data_version(days: list[date] | None = None) -> int:
+    return await data_versions.latest(days)
+
+
+async def bump_data_version(dates: Iterable[date]) -> None:
+    """
+    Mark `dates` as changed, so that cached entries covering any of them are
+    no longer read. Entries for other dates stay warm.
+    """
+    try:
+        await data_versions.bump(dates)
+    except Exception:
+        logger.warning("Error bumping the data version", exc_info=True)
+
+
+async def key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Request | None = None,
+    response: Response | None = None,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> str:
+    """
+    Key an endpoint call by the endpoint, the data version and the semantic
+    query only: injected dependencies are left out and filters are reduced
+    to their effective values, so equivalent requests share an entry.
+
+    The data version covers the range of the query's date parameters, so
+    ingesting a date only invalidates the entries that may include it.
+    """
+    parameters = signature(func).parameters
+    query = {}
+    for name, value in kwargs.items():
+        if isinstance(value, BaseFilter):
+            query.update(value.query_params())
+        elif not (
+            value is None
+            or isinstance(value, (Request, Response))
+            or isinstance(getattr(parameters.get(name), "default", None), Depends)
+        ):
+            query[name] = value
+
+    digest = hashlib.md5(
+        orjson.dumps(query, option=orjson.OPT_SORT_KEYS, default=str)
+    ).hexdigest()
+    days = [value for value in query.values() if isinstance(value, date)]
+    version = await get_data_version(days)
+    return f"{namespace}:{func.__module__}:{func.__name__}:{version}:{digest}"
+
+
+@asynccontextmanager
+async def _worker_lock(key: str, timeout: int):
+    """
+    Hold a Redis lock on `key` for up to `timeout` seconds, waiting as long
+    for another worker to release it. Without a Redis backend this is a no-op.
+    """
+    redis = getattr(FastAPICache.get_backend(), "redis", None)
+    if redis is None:
+        yield
+        return
+
+    lock = redis.lock(f"{key}:lock", timeout=timeout, blocking_timeout=timeout)
+    try:
+        acquired = await lock.acquire()
+    except Exception:
+        logger.warning(f"Error acquiring the lock of '{key}'", exc_info=True)
+        acquired = False
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning(f"Lock of '{key}' expired before release")
+
+
+async def single_flight(
+    key: str, call: Callable[[], Awaitable[Any]], lock_timeout: int | None = None
+) -> Any:
+    """
+    Run `call` for one caller per key at a time in this process, and in one
+    worker at a time when `lock_timeout` is set. Concurrent callers receive
+    the same result, or the same exception, instead of running `call`; they
+    only take over when the running call was cancelled.
+    """
+    while (flight := _flights.get(key)) is not None:
+        try:
+            return await asyncio.shield(flight)
+        except asyncio.CancelledError:
+            if not flight.cancelled():
+                raise
+
+    _flights[key] = flight = asyncio.get_running_loop().create_future()
+    try:
+        if lock_timeout is None:
+            result = await call()
+        else:
+            async with _worker_lock(key, lock_timeout):
+                result = await call()
+    except asyncio.CancelledError:
+        flight.cancel()
+        raise
+    except Exception as e:
+        flight.set_exception(e)
+        # Raised here anyway, whether or not anyone waited for it.
+        flight.exception()
+        raise
+    else:
+        flight.set_result(result)
+        return result
+    finally:
+        del _flights[key]
+
+
+def _copy_response(response: Response) -> Response:
+    copy = Response(content=response.body, status_code=response.status_code)
+    copy.raw_headers = list(response.raw_headers)
+    return copy
+
+
+async def _is_stale(key: str, max_stale: int) -> bool:
+    """
+    Whether `key` is cached but past its freshness, i.e. within the last
+    `max_stale` seconds of its backend TTL.
+    """
+    try:
+        ttl, value = await FastAPICache.get_backend().get_with_ttl(key)
+    except Exception:
+        logger.warning(f"Error retrieving cache key '{key}'", exc_info=True)
+        return False
+    return value is not None and 0 <= ttl <= max_stale
+
+
+def _etag(key: str) -> str:
+    return f'"{hashlib.md5(key.encode()).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _http_date(value: datetime) -> str:
+    # Naive timestamps are stored in UTC.
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _not_modified_since(modified: datetime, if_modified_since: str) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+async def _get_last_modified(key: str) -> datetime | None:
+    try:
+        modified = await FastAPICache.get_backend().get(f"{key}:last-modified")
+    except Exception:
+        logger.warning(f"Error retrieving Last-Modified of '{key}'", exc_info=True)
+        return None
+    if isinstance(modified, bytes):
+        modified = modified.decode()
+    return datetime.fromisoformat(modified) if modified else None
+
+
+async def _set_last_modified(key: str, modified: datetime, expire: int) -> None:
+    try:
+        await FastAPICache.get_backend().set(
+            f"{key}:last-modified", modified.isoformat().encode(), expire
+        )
+    except Exception:
+        logger.warning(f"Error setting Last-Modified of '{key}'", exc_info=True)
+
+
+def _claim_revalidation(key: str, max_stale: int) -> bool:
+    """
+    Claim the revalidation of `key` unless one is already running in this
+    process. A claim not released within `max_stale` seconds is dropped.
+    """
+    started = _revalidations.get(key)
+    if started is not None and time.monotonic() - started < max_stale:
+        return False
+    _revalidations[key] = time.monotonic()
+    return True
+
+
+async def _revalidate(
+    key: str,
+    call: Callable[[], Awaitable[Any]],
+    coder: type[ORJSONCoder],
+    expire: int,
+    max_stale: int,
+    lock_timeout: int | None,
+    last_modified: Callable[[Any], datetime | None] | None,
+    repositories: list[SqlAlchemyRepository],
+) -> None:
+    """
+    Recompute a stale entry after its response was sent. The request's
+    sessions were closed by then, so they are reopened and closed again.
+    """
+    try:
+        lock = _worker_lock(key, lock_timeout) if lock_timeout else nullcontext()
+        async with lock:
+            # Another worker may have refreshed it while we waited for the lock.
+            if await _is_stale(key, max_stale):
+                result = await call()
+                await FastAPICache.get_backend().set(key, coder.encode(result), expire)
+                if last_modified and (modified := last_modified(result)):
+                    await _set_last_modified(key, modified, expire)
+    except Exception:
+        logger.warning(f"Error revalidating cache key '{key}'", exc_info=True)
+    finally:
+        _revalidations.pop(key, None)
+        for repository in repositories:
+            await repository.session.close()
+
+
+@contextmanager
+def warming():
+    """
+    Recompute stale entries before returning them rather than after the
+    response is sent, for callers that don't send one, like the warmer.
+    """
+    token = _warming.set(True)
+    try:
+        yield
+    finally:
+        _warming.reset(token)
+
+
+def cache(
+    expire: int | None = None,
+    bypass: Callable[[Request], bool] | None = None,
+    coalesce: bool = False,
+    lock_timeout: int | None = None,
+    max_stale: int | None = None,
+    etag: bool = False,
+    last_modified: Callable[[Any], datetime | None] | None = None,
+    **kwargs,
+):
+    """
+    fastapi_cache's cache decorator keyed by `key_builder` and storing
+    orjson-encoded bytes. Both a hit and a computed result are returned as a
+    ready JSON response, so FastAPI doesn't validate them against the
+    response model again. It calls the endpoint directly, without reading or
+    writing the cache, when `bypass(request)` is true.
+
+    With `coalesce`, concurrent misses of a key are computed once per
+    process (see `single_flight`), and once across workers when
+    `lock_timeout` is also set.
+
+    With `max_stale`, entries are kept `max_stale` seconds past `expire`.
+    Such a stale entry is still served, and recomputed in the background
+    after the response is sent; older entries are missed as usual. Within
+    `warming()` it is recomputed right away instead.
+
+    With `etag`, responses carry a strong ETag derived from the cache key,
+    i.e. from the query and its data version, and a matching If-None-Match
+    is answered with 304 before the cache or the endpoint is touched.
+    `last_modified(result)` gives the Last-Modified of a computed result,
+    which is cached next to it and checked against If-Modified-Since.
+
+    The endpoint must declare a `Request` parameter to be bypassable.
+    """
+    if max_stale is not None and expire is None:
+        raise ValueError("max_stale requires expire")
+
+    kwargs.setdefault("coder", ORJSONCoder)
+    build_key = kwargs.pop("key_builder", key_builder)
+    coder = kwargs["coder"]
+    namespace = kwargs.get("namespace", "")
+    if max_stale is not None:
+        expire += max_stale
+
+    def wrapper(func):
+        @wraps(func)
+        async def encoded(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+            if (computed := _computed.get()) is not None:
+                computed.append(result)
+            return Response(content=coder.encode(result), media_type="application/json")
+
+        def built_key(*args, **kwargs) -> str:
+            return _key.get()
+
+        cached = fastapi_cache(expire=expire, key_builder=built_key, **kwargs)(encoded)
+        parameters = signature(func).parameters
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            background_tasks = kwargs.pop(_injected_background_tasks.name, None)
+            request = next(
+                (value for value in kwargs.values() if isinstance(value, Request)),
+                None,
+            )
+
+            def call():
+                return func(
+                    *args, **{k: v for k, v in kwargs.items() if k in parameters}
+                )
+
+            if bypass is not None and request is not None and bypass(request):
+                return await call()
+
+            key = build_key(
+                func,
+                f"{FastAPICache.get_prefix()}:{namespace}",
+                request=request,
+                response=None,
+                args=args,
+                kwargs=kwargs,
+            )
+            if isawaitable(key):
+                key = await key
+            stale = max_stale is not None and await _is_stale(key, max_stale)
+            if stale and _warming.get():
+                if _claim_revalidation(key, max_stale):
+                    await _revalidate(
+                        key,
+                        call,
+                        coder,
+                        expire,
+                        max_stale,
+                        lock_timeout,
+                        last_modified,
+                        [],
+                    )
+                stale = False
+
+            def revalidate_after(response: Response) -> Response:
+                if stale and _claim_revalidation(key, max_stale):
+                    repositories = [
+                        value
+                        for value in kwargs.values()
+                        if isinstance(value, SqlAlchemyRepository)
+                    ]
+                    task = (
+                        _revalidate,
+                        key,
+                        call,
+                        coder,
+                        expire,
+                        max_stale,
+                        lock_timeout,
+                        last_modified,
+                        repositories,
+                    )
+                    if background_tasks is not None:
+                        background_tasks.add_task(*task)
+                    else:
+                        response.background = BackgroundTask(*task)
+                return response
+
+            validators = {}
+            if etag:
+                validators["ETag"] = _etag(key)
+            if request is not None and (etag or last_modified):
+                if_none_match = request.headers.get("If-None-Match")
+                if_modified_since = request.headers.get("If-Modified-Since")
+                if etag and if_none_match:
+                    if _etag_matches(if_none_match, validators["ETag"]):
+                        return revalidate_after(
+                            Response(status_code=304, headers=validators)
+                        )
+                elif last_modified and if_modified_since:
+                    modified = await _get_last_modified(key)
+                    if modified and _not_modified_since(modified, if_modified_since):
+                        validators["Last-Modified"] = _http_date(modified)
+                        return revalidate_after(
+                            Response(status_code=304, headers=validators)
+                        )
+
+            # FastAPI drops the headers set on the injected response when the
+            # endpoint returns a response of its own, so carry them over.
+            response = next(
+                (value for value in kwargs.values() if isinstance(value, Response)),
+                None,
+            )
+
+            async def fetch():
+                result = await cached(*args, **kwargs)
+                headers = {} if response in (None, result) else dict(response.headers)
+                return result, headers, list(computed)
+
+            computed_token = _computed.set(computed := [])
+            key_token = _key.set(key)
+            try:
+                if coalesce:
+                    # Concurrent callers share the result, so each takes a copy.
+                    result, headers, shared = await single_flight(
+                        key, fetch, lock_timeout
+                    )
+                    computed[:] = shared
+                    if isinstance(result, Response):
+                        result = _copy_response(result)
+                else:
+                    result, headers, _ = await fetch()
+            finally:
+                _computed.reset(computed_token)
+                _key.reset(key_token)
+
+            if isinstance(result, Response) and result is not response:
+                result.headers.update(headers)
+
+            if last_modified:
+                if not computed:
+                    modified = await _get_last_modified(key)
+                elif modified := last_modified(computed[0]):
+                    await _set_last_modified(key, modified, expire)
+                if modified:
+                    validators["Last-Modified"] = _http_date(modified)
+
+            target = result if isinstance(result, Response) else response
+            if target is None:
+                return result
+            target.headers.update(validators)
+            if max_stale is not None:
+                # The backend TTL includes the stale window, clients shouldn't.
+                cache_control = target.headers.get("Cache-Control", "")
+                if cache_control.startswith("max-age="):
+                    max_age = int(cache_control.removeprefix("max-age=")) - max_stale
+                    target.headers["Cache-Control"] = f"max-age={max(max_age, 0)}"
+            if isinstance(result, Response):
+                revalidate_after(result)
+            return result
+
+        cached_signature = cached.__signature__
+        inner.__signature__ = cached_signature.replace(
+            parameters=[
+                *cached_signature.parameters.values(),
+                _injected_background_tasks,
+            ]
+        )
+        return inner
+
+    return wrapper
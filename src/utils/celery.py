@@ -1,10 +1,10 @@
 import asyncio
 
 from celery import Celery
-from celery.schedules import crontab
 from fastapi_cache import FastAPICache
 
 from src.config import settings
+from src.utils import warmer
 from src.utils.redis import init_redis_cache
 
 
@@ -20,9 +20,7 @@ def clear_cache():
     asyncio.run(FastAPICache.clear())
 
 
-celery_app.conf.beat_schedule = {
-    "reset-cache-every-day-at-14-11": {
-        "task": "src.utils.celery.clear_cache",
-        "schedule": crontab(hour="14", minute="11"),
-    },
-}
+@celery_app.task
+def warm_cache():
+    init_redis_cache()
+    asyncio.run(warmer.warm_cache())
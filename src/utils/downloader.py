@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date
+
+from httpx import AsyncBaseTransport, AsyncClient, HTTPError, Limits
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DownloadResult:
+    date: date
+    content: bytes | None = None
+    error: str | None = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class SpimexDownloader:
+    """
+    Download SPIMEX bulletins over a shared keep-alive connection pool.
+
+    At most `concurrency` requests run at once; server errors and transport
+    failures are retried with exponential backoff. A missing bulletin
+    (non-trading day) is a successful result without content.
+    """
+
+    url = "https://spimex.com/upload/reports/oil_xls/oil_xls_{date}162000.xls"
+
+    def __init__(
+        self,
+        concurrency: int = settings.ingest.DOWNLOAD_CONCURRENCY,
+        retries: int = settings.ingest.DOWNLOAD_RETRIES,
+        backoff: float = settings.ingest.DOWNLOAD_BACKOFF,
+        timeout: float = settings.ingest.DOWNLOAD_TIMEOUT,
+        transport: AsyncBaseTransport | None = None,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = AsyncClient(
+            timeout=timeout,
+            limits=Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "SpimexDownloader":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self._client.aclose()
+
+    async def download(self, date: date) -> DownloadResult:
+        result = DownloadResult(date=date)
+        url = self.url.format(date=date.strftime("%Y%m%d"))
+
+        async with self._semaphore:
+            while result.attempts <= self.retries:
+                if result.attempts:
+                    await asyncio.sleep(self.backoff * 2 ** (result.attempts - 1))
+                result.attempts += 1
+
+                try:
+                    response = await self._client.get(url)
+                except HTTPError as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                    continue
+
+                if response.status_code == 200:
+                    result.content, result.error = response.content, None
+                    return result
+                if response.status_code < 500 and response.status_code != 429:
+                    result.error = None
+                    return result
+                result.error = f"HTTP {response.status_code}"
+
+        logger.error(f"Download of {date} failed after {result.attempts} attempts")
+        return result
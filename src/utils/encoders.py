@@ -0,0 +1,77 @@
+import csv
+from collections.abc import AsyncIterator, Mapping, Sequence
+from datetime import date
+from io import StringIO
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi_cache.coder import Coder
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return jsonable_encoder(value)
+
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, date) else value
+
+
+async def ndjson_chunks(
+    partitions: AsyncIterator[Sequence[Mapping]],
+) -> AsyncIterator[bytes]:
+    """
+    Encode partitions of rows as newline-delimited JSON, one chunk per partition.
+    """
+    async for rows in partitions:
+        yield b"".join(
+            orjson.dumps(dict(row), default=_orjson_default) + b"\n" for row in rows
+        )
+
+
+async def csv_chunks(
+    partitions: AsyncIterator[Sequence[Mapping]], columns: list[str]
+) -> AsyncIterator[bytes]:
+    """
+    Encode partitions of rows as CSV with a header line, one chunk per partition.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    async for rows in partitions:
+        writer.writerows(
+            [_csv_value(row[column]) for column in columns] for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ORJSONCoder(Coder):
+    """
+    fastapi_cache coder that stores responses as orjson-encoded bytes and
+    serves a hit as a ready JSON response, without decoding it back into
+    models and encoding it again.
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        if isinstance(value, Response):
+            return value.body
+        return orjson.dumps(value, default=_orjson_default)
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        return orjson.loads(value)
+
+    @classmethod
+    def decode_as_type(cls, value: bytes, *, type_: Any) -> Response:
+        return Response(content=value, media_type="application/json")
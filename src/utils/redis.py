@@ -3,11 +3,23 @@ from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 
 from src.config import settings
+from src.utils.cache import data_versions
+from src.utils.encoders import ORJSONCoder
+from src.utils.tiered_cache import TieredBackend
 
-redis = aioredis.from_url(
-    f"redis://{settings.redis.HOST}", encoding="utf8", decode_responses=True
-)
+PREFIX = "fastapi-cache"
 
+redis = aioredis.from_url(f"redis://{settings.redis.HOST}")
 
-def init_redis_cache() -> None:
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+
+def init_redis_cache() -> TieredBackend:
+    backend = TieredBackend(
+        RedisBackend(redis),
+        redis,
+        channel=f"{PREFIX}:invalidate",
+        max_bytes=settings.redis.LOCAL_MAX_BYTES,
+        local_ttl=settings.redis.LOCAL_EXPIRE,
+    )
+    backend.subscribers.append(data_versions.invalidate)
+    FastAPICache.init(backend, prefix=PREFIX, coder=ORJSONCoder)
+    return backend
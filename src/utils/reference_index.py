@@ -0,0 +1,96 @@
+import asyncio
+from bisect import bisect_left
+from collections.abc import Awaitable, Iterable, Mapping
+from datetime import date
+from typing import Any, Callable
+
+from src.utils.cache import get_data_version, get_data_versions
+
+# Kind of reference data: its id column and name column.
+KINDS = {
+    "oil_ids": ("oil_id", None),
+    "delivery_bases": ("delivery_basis_id", "delivery_basis_name"),
+    "products": ("exchange_product_id", "exchange_product_name"),
+}
+
+Load = Callable[
+    [str, str | None, list[date] | None], Awaitable[list[tuple[str, str | None]]]
+]
+
+
+class ReferenceIndex:
+    """
+    In-process index of the distinct oil ids, delivery bases and products,
+    kept sorted by id for prefix search.
+
+    `refresh` loads everything once, and afterwards only the dates whose
+    data version changed, i.e. which any process ingested since. Ingestion
+    in this process adds its rows right away through `update_rows`.
+    """
+
+    def __init__(self):
+        self._names: dict[str, dict[str, str | None]] = {kind: {} for kind in KINDS}
+        self._ids: dict[str, list[str]] = {kind: [] for kind in KINDS}
+        self._versions: dict[str, int] | None = None
+        self._latest: int | None = None
+        self._lock = asyncio.Lock()
+
+    def update(self, kind: str, items: Iterable[tuple[str, str | None]]) -> None:
+        names = self._names[kind]
+        size = len(names)
+        names.update(items)
+        if len(names) != size:
+            self._ids[kind] = sorted(names)
+
+    def update_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        rows = list(rows)
+        for kind, (id_column, name_column) in KINDS.items():
+            self.update(
+                kind,
+                ((row[id_column], row.get(name_column)) for row in rows),
+            )
+
+    def search(
+        self, kind: str, prefix: str = "", limit: int | None = None
+    ) -> list[tuple[str, str | None]]:
+        """
+        Return the ids starting with `prefix` in order, with their names.
+        """
+        ids, names = self._ids[kind], self._names[kind]
+        found = []
+        for index in range(bisect_left(ids, prefix), len(ids)):
+            if not ids[index].startswith(prefix) or len(found) == limit:
+                break
+            found.append((ids[index], names[ids[index]]))
+        return found
+
+    async def refresh(self, load: Load) -> None:
+        """
+        Catch up with ingestion, calling `load(id_column, name_column, dates)`
+        for each kind when anything changed.
+        """
+        latest = await get_data_version()
+        if latest == self._latest:
+            return
+
+        async with self._lock:
+            # A concurrent refresh may have caught up while this one waited.
+            if self._latest is not None and self._latest >= latest:
+                return
+            versions = await get_data_versions()
+            if self._versions is None:
+                dates = None
+            else:
+                dates = [
+                    date.fromisoformat(day)
+                    for day, version in versions.items()
+                    if self._versions.get(day) != version
+                ]
+            if dates != []:
+                for kind, (id_column, name_column) in KINDS.items():
+                    self.update(kind, await load(id_column, name_column, dates))
+            self._versions = versions
+            self._latest = max(versions.values(), default=0)
+
+
+reference_index = ReferenceIndex()
@@ -1,8 +1,20 @@
 import logging
 from typing import TYPE_CHECKING, TypeVar, Sequence, Any
 
-from sqlalchemy import select, and_, desc, Column
+from sqlalchemy import (
+    select,
+    and_,
+    any_,
+    bindparam,
+    desc,
+    insert,
+    text,
+    tuple_,
+    Column,
+)
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import column as column_clause, table as table_clause
 
 from src.models import Base
 
@@ -28,12 +40,140 @@ class SqlAlchemyRepository:
         self.session.add_all(entities)
         await self.session.commit()
 
+    async def bulk_save(self, rows: list[dict[str, Any]]) -> int:
+        """
+        Insert plain rows bypassing the ORM unit of work.
+
+        Uses asyncpg COPY when the session runs on asyncpg and falls back to
+        a multi-row INSERT for other drivers.
+        """
+        if not rows:
+            return 0
+
+        rows = [self._with_defaults(row) for row in rows]
+        connection = await self.session.connection()
+
+        if connection.dialect.driver == "asyncpg":
+            table = self.model.__table__
+            columns = list(rows[0])
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                table.name,
+                schema_name=table.schema,
+                columns=columns,
+                records=[tuple(row[column] for column in columns) for row in rows],
+            )
+        else:
+            await self.session.execute(insert(self.model), rows)
+
+        await self.session.commit()
+        return len(rows)
+
+    async def upsert_all(
+        self, rows: list[dict[str, Any]], index_elements: list[str], batch_size: int
+    ) -> int:
+        """
+        Insert rows, updating existing ones on conflict over `index_elements`.
+        Rows whose values didn't change are left untouched.
+
+        On asyncpg the rows are COPYed into a temporary staging table and
+        merged with a single INSERT ... SELECT; other drivers insert them in
+        batches of `batch_size`.
+        """
+        if not rows:
+            return 0
+
+        table = self.model.__table__
+        rows = [self._with_defaults(row) for row in rows]
+        columns = list(rows[0])
+        connection = await self.session.connection()
+
+        if connection.dialect.driver == "asyncpg":
+            staging = f"{table.name}_staging"
+            await self.session.execute(
+                text(
+                    f"CREATE TEMPORARY TABLE {staging} "
+                    f"(LIKE {table.fullname} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+            )
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                staging,
+                columns=columns,
+                records=[tuple(row[column] for column in columns) for row in rows],
+            )
+            source = table_clause(staging, *(column_clause(name) for name in columns))
+            query = postgresql.insert(table).from_select(
+                columns, select(source), include_defaults=False
+            )
+            await self.session.execute(
+                self._on_conflict_update(query, columns, index_elements)
+            )
+        else:
+            for start in range(0, len(rows), batch_size):
+                query = postgresql.insert(table).values(
+                    rows[start : start + batch_size]
+                )
+                await self.session.execute(
+                    self._on_conflict_update(query, columns, index_elements)
+                )
+
+        await self.session.commit()
+        return len(rows)
+
+    def _on_conflict_update(
+        self, query: postgresql.Insert, columns: list[str], index_elements: list[str]
+    ) -> postgresql.Insert:
+        table = self.model.__table__
+        updated = [
+            column
+            for column in columns
+            if column not in index_elements and not table.c[column].primary_key
+        ]
+        set_ = {column: query.excluded[column] for column in updated}
+        for column in table.c:
+            if column.onupdate is not None and column.onupdate.is_clause_element:
+                set_.setdefault(column.name, column.onupdate.arg)
+        return query.on_conflict_do_update(
+            index_elements=index_elements,
+            set_=set_,
+            where=tuple_(*(table.c[column] for column in updated)).is_distinct_from(
+                tuple_(*(query.excluded[column] for column in updated))
+            ),
+        )
+
+    def _with_defaults(self, row: dict[str, Any]) -> dict[str, Any]:
+        """
+        Fill client-side column defaults that COPY would otherwise skip.
+        """
+        for column in self.model.__table__.columns:
+            if column.name in row or column.default is None:
+                continue
+            if column.default.is_callable:
+                row[column.name] = column.default.arg(None)
+            elif column.default.is_scalar:
+                row[column.name] = column.default.arg
+        return row
+
     async def get_by_id(self, entity_id: Any) -> T:
         result: Result = await self.session.execute(
             select(self.model).where(and_(self.model.id == entity_id))
         )
         return result.scalar_one_or_none()
 
+    async def get_by_ids(self, entity_ids: Sequence[Any]) -> Sequence[T]:
+        """
+        Fetch the entities with any of `entity_ids` in one query, binding the
+        ids as a single array parameter.
+        """
+        ids = bindparam(
+            "ids", list(entity_ids), type_=postgresql.ARRAY(self.model.id.type)
+        )
+        result: Result = await self.session.execute(
+            select(self.model).where(self.model.id == any_(ids))
+        )
+        return result.scalars().all()
+
     async def get_grouped_query_with_limit(
         self, column: Column, limit: int
     ) -> Sequence[T]:
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable
+from uuid import uuid4
+
+import orjson
+from fastapi_cache.types import Backend
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    In-process cache bounded by the total size of its values; the least
+    recently used entries are evicted first and expired entries on access.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[bytes, float | None, float | None]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> tuple[int, bytes] | None:
+        """
+        Return the remaining TTL (-1 without expiry) and value of `key`.
+        """
+        if (entry := self._entries.get(key)) is None:
+            return None
+        value, deadline, ttl_deadline = entry
+        now = time.monotonic()
+        if deadline is not None and deadline <= now:
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return (-1 if ttl_deadline is None else int(ttl_deadline - now)), value
+
+    def set(
+        self, key: str, value: bytes, expire: int | None = None, ttl: int | None = None
+    ) -> None:
+        """
+        Store `value` for `expire` seconds, reporting `ttl` (by default the
+        same, -1 for no expiry) as its remaining TTL, e.g. the TTL of the
+        shared entry.
+        """
+        self.delete(key)
+        if len(value) > self.max_bytes:
+            return
+        now = time.monotonic()
+        deadline = now + expire if expire else None
+        if ttl is None:
+            ttl_deadline = deadline
+        else:
+            ttl_deadline = now + ttl if ttl > 0 else None
+        self._entries[key] = (value, deadline, ttl_deadline)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (evicted, *_) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.size -= len(entry[0])
+
+    def clear(self, namespace: str | None = None) -> None:
+        for key in [key for key in self._entries if key.startswith(namespace or "")]:
+            self.delete(key)
+
+
+class TieredBackend(Backend):
+    """
+    fastapi_cache backend reading through an in-process LRU tier in front of
+    a shared backend such as Redis.
+
+    Local entries live no longer than the shared entry's remaining TTL,
+    capped at `local_ttl`, and report the shared entry's TTL. Writes and
+    clears are published on a Redis channel so that other processes drop
+    their local copies; `subscribers` are called with every invalidation
+    this process applies, as `subscriber(namespace, key)`.
+    """
+
+    def __init__(
+        self,
+        remote: Backend,
+        redis: Redis,
+        channel: str,
+        max_bytes: int,
+        local_ttl: int,
+    ):
+        self.remote = remote
+        self.redis = redis
+        self.channel = channel
+        self.local = LRUCache(max_bytes)
+        self.local_ttl = local_ttl
+        self.counters = {tier: {"hits": 0, "misses": 0} for tier in ("local", "remote")}
+        self.subscribers: list[Callable[[str | None, str | None], None]] = []
+        self._node = uuid4().hex
+        self._listener: asyncio.Task | None = None
+        self._subscribed = False
+
+    async def get_with_ttl(self, key: str) -> tuple[int, bytes | None]:
+        if (cached := self.local.get(key)) is not None:
+            self.counters["local"]["hits"] += 1
+            return cached
+        self.counters["local"]["misses"] += 1
+
+        ttl, value = await self.remote.get_with_ttl(key)
+        self.counters["remote"]["hits" if value is not None else "misses"] += 1
+        if value is not None and (ttl > 0 or ttl == -1):
+            self.local.set(key, value, self._local_expire(ttl), ttl)
+        return ttl, value
+
+    async def get(self, key: str) -> bytes | None:
+        _, value = await self.get_with_ttl(key)
+        return value
+
+    async def set(self, key: str, value: bytes, expire: int | None = None) -> None:
+        await self.remote.set(key, value, expire)
+        self.local.set(key, value, self._local_expire(expire), expire or -1)
+        await self.publish(key=key)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        count = await self.remote.clear(namespace, key)
+        self._invalidate(namespace, key)
+        await self.publish(namespace=namespace, key=key)
+        return count
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return self.counters | {
+            "local": self.counters["local"]
+            | {"entries": len(self.local), "bytes": self.local.size}
+        }
+
+    @property
+    def listening(self) -> bool:
+        """
+        Whether invalidations from other processes are being received.
+        """
+        return self._subscribed
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._subscribed = False
+
+    def _local_expire(self, ttl: int | None) -> int:
+        return min(ttl, self.local_ttl) if ttl and ttl > 0 else self.local_ttl
+
+    def _invalidate(self, namespace: str | None, key: str | None) -> None:
+        if namespace:
+            self.local.clear(namespace)
+        elif key:
+            self.local.delete(key)
+        else:
+            self.local.clear()
+        for subscriber in self.subscribers:
+            subscriber(namespace, key)
+
+    async def publish(self, namespace: str | None = None, key: str | None = None):
+        """
+        Tell the other processes to drop their local copies of `key`, of
+        `namespace`, or of everything.
+        """
+        message = {"node": self._node, "namespace": namespace, "key": key}
+        try:
+            await self.redis.publish(self.channel, orjson.dumps(message))
+        except Exception:
+            logger.warning("Error publishing a cache invalidation", exc_info=True)
+
+    def _on_message(self, data: bytes) -> None:
+        message = orjson.loads(data)
+        if message["node"] != self._node:
+            self._invalidate(message["namespace"], message["key"])
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # Drop whatever was read while no invalidation came in.
+                    self._invalidate(None, None)
+                    self._subscribed = True
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._on_message(message["data"])
+            except Exception:
+                # Invalidations may have been missed while disconnected.
+                logger.warning("Cache invalidation channel lost", exc_info=True)
+                self._subscribed = False
+                self._invalidate(None, None)
+                await asyncio.sleep(1)
@@ -0,0 +1,42 @@
+from collections.abc import Awaitable
+from datetime import date
+from typing import Callable
+
+from src.config import settings
+from src.utils.cache import get_data_version
+
+
+class RecentTradingDays:
+    """
+    In-process copy of the latest `size` trading days, newest first.
+
+    The copy is reloaded once the data version changes, i.e. after any
+    process ingested new results, or after `invalidate`.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._days: list[date] = []
+        self._version: int | None = None
+
+    async def get(
+        self, days_num: int, load: Callable[[int], Awaitable[list[date]]]
+    ) -> list[date]:
+        """
+        Return the latest `days_num` trading days, calling `load(size)` only
+        when the copy is outdated or `days_num` exceeds it.
+        """
+        if days_num > self.size:
+            return await load(days_num)
+
+        version = await get_data_version()
+        if version != self._version:
+            self._days = await load(self.size)
+            self._version = version
+        return self._days[:days_num]
+
+    def invalidate(self) -> None:
+        self._version = None
+
+
+recent_trading_days = RecentTradingDays(settings.api.RECENT_DAYS)
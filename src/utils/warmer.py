@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import fields
+from datetime import date, timedelta
+
+import orjson
+from fastapi import Request
+from fastapi_cache import FastAPICache
+
+from src.config import settings
+from src.database.db import async_session_maker
+from src.repositories import SpimexRepository
+from src.schemas import TradingFilters
+from src.utils.cache import warming
+
+logger = logging.getLogger(__name__)
+
+ACCESS_KEY = "access"
+
+
+def _access_key(day: date) -> str:
+    return f"{FastAPICache.get_prefix()}:{ACCESS_KEY}:{day.isoformat()}"
+
+
+async def record_access(filters: TradingFilters) -> None:
+    """
+    Count the oil_id/delivery_basis_id combination of a filtered query in
+    today's access stats. Without a Redis backend nothing is recorded.
+    """
+    redis = getattr(FastAPICache.get_backend(), "redis", None)
+    if redis is None or (filters.oil_id, filters.delivery_basis_id) == (None, None):
+        return
+
+    key = _access_key(date.today())
+    member = orjson.dumps([filters.oil_id, filters.delivery_basis_id])
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(key, 1, member)
+            pipe.expire(key, settings.warm.ACCESS_DAYS * 24 * 60 * 60)
+            await pipe.execute()
+    except Exception:
+        logger.warning("Error recording access stats", exc_info=True)
+
+
+async def get_top_filters(
+    limit: int, days: int
+) -> list[tuple[list[str] | None, list[str] | None]]:
+    """
+    Return the `limit` oil_id/delivery_basis_id combinations queried most
+    over the last `days` days.
+    """
+    redis = getattr(FastAPICache.get_backend(), "redis", None)
+    if redis is None:
+        return []
+
+    today = date.today()
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for offset in range(days):
+                pipe.zrange(
+                    _access_key(today - timedelta(offset)), 0, -1, withscores=True
+                )
+            stats = await pipe.execute()
+    except Exception:
+        logger.warning("Error retrieving access stats", exc_info=True)
+        return []
+
+    counts = Counter()
+    for members in stats:
+        for member, score in members:
+            counts[member] += score
+    return [tuple(orjson.loads(member)) for member, _ in counts.most_common(limit)]
+
+
+def make_filters(**kwargs) -> TradingFilters:
+    """
+    Build the filters FastAPI would for a request setting only `kwargs`.
+    """
+    defaults = {field.name: field.default.default for field in fields(TradingFilters)}
+    return TradingFilters(**defaults | kwargs)
+
+
+async def warm_cache() -> int:
+    """
+    Precompute the cached responses of the hot query shapes: the trading
+    days, the latest trading results unfiltered and for the most queried
+    filters, and the configured dynamics windows up to the latest date.
+
+    At most WARM_CONCURRENCY shapes are computed at once. Shapes that are
+    already cached are only read, and stale ones are recomputed before
+    returning. Returns the number of shapes warmed.
+    """
+    from src.api.v1.routers.spimex_trading import (
+        get_dynamics,
+        get_trading_days,
+        get_trading_results,
+    )
+
+    async with async_session_maker() as session:
+        latest = await SpimexRepository(session).get_last_trading_dates(1)
+    top_filters = await get_top_filters(
+        settings.warm.TOP_FILTERS, settings.warm.ACCESS_DAYS
+    )
+
+    shapes = [(get_trading_days, {"days": days}) for days in settings.warm.TRADING_DAYS]
+    shapes += [
+        (
+            get_trading_results,
+            {"sp_filters": make_filters(oil_id=oil_id, delivery_basis_id=basis_id)},
+        )
+        for oil_id, basis_id in [(None, None), *top_filters]
+    ]
+    if latest:
+        request = Request(
+            {"type": "http", "method": "GET", "query_string": b"", "headers": []}
+        )
+        shapes += [
+            (
+                get_dynamics,
+                {
+                    "request": request,
+                    "start": latest[0] - timedelta(days),
+                    "end": latest[0],
+                    "format": "json",
+                    "sp_filters": make_filters(),
+                },
+            )
+            for days in settings.warm.DYNAMICS_DAYS
+        ]
+
+    semaphore = asyncio.Semaphore(settings.warm.CONCURRENCY)
+
+    async def warm(endpoint, kwargs) -> bool:
+        async with semaphore, async_session_maker() as session:
+            try:
+                # Nothing sends these responses, so their background tasks
+                # would never run.
+                with warming():
+                    await endpoint(**kwargs, spimex_repo=SpimexRepository(session))
+            except Exception:
+                logger.warning(f"Error warming {endpoint.__name__}", exc_info=True)
+                return False
+            return True
+
+    warmed = sum(await asyncio.gather(*(warm(*shape) for shape in shapes)))
+    logger.info(f"Warmed {warmed} of {len(shapes)} cached query shapes")
+    return warmed
@@ -1,23 +1,37 @@
 import pytest
 from datetime import date
+from uuid import uuid4
 from httpx import AsyncClient
 
+from src.config import settings
+from src.repositories import DailySummaryRepository
 from tests.conftest import TEST_SPIMEX_DATA
 
 
 class TestSpimexEndpoind:
 
     @pytest.mark.asyncio
-    async def test_save_spimex_trading_results(self, mocker, api_client: AsyncClient):
+    @pytest.mark.parametrize("loaded, warmed", [(1, 1), (0, 0)])
+    async def test_save_spimex_trading_results(
+        self, mocker, api_client: AsyncClient, loaded, warmed
+    ):
         mocker.patch(
             "src.repositories.SpimexRepository.save_to_db",
-            return_value="saving done",
+            return_value={
+                "download": 0.5,
+                "parse": 0.2,
+                "insert": 0.1,
+                "total": 0.6,
+                "loaded": loaded,
+            },
         )
+        warm_cache = mocker.patch("src.api.v1.routers.spimex_trading.warm_cache")
 
         response = await api_client.get("api/v1/", params={"date": date(2024, 10, 7)})
 
         assert response.status_code == 200
-        assert "saving done" in response.json()
+        assert response.json()["total"] == 0.6
+        assert warm_cache.await_count == warmed
 
     @pytest.mark.usefixtures("fastapi_cache")
     @pytest.mark.asyncio
@@ -74,6 +88,8 @@ class TestSpimexEndpoind:
             (date(2024, 10, 1), date(2024, 10, 6), "FOUR", "D", None, 1),
             (date(2024, 10, 3), date(2024, 10, 6), None, "D", None, 4),
             (date(2024, 10, 1), date(2024, 10, 6), None, None, "EIGHT", 0),
+            (date(2024, 10, 1), date(2024, 10, 6), ["ONE", "FOUR"], None, None, 2),
+            (date(2024, 10, 1), date(2024, 10, 6), None, ["A", "B"], None, 2),
             (date(2024, 10, 6), date(2024, 10, 1), None, None, None, 0),
         ],
     )
@@ -103,6 +119,148 @@ class TestSpimexEndpoind:
 
         assert len(data["playload"]) == quantity
 
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.parametrize(
+        "params, quantity",
+        [
+            ({"exchange_product_id": "TEST_S"}, 2),
+            ({"exchange_product_id": ["TEST_O", "TEST_TW"]}, 2),
+            ({"exchange_product_id": "TEST%"}, 0),
+            ({"volume_min": 300, "volume_max": 500}, 3),
+            ({"total_max": 2, "delivery_type_id": ["A", "D"]}, 1),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_get_dynamics_product_and_range_filters(
+        self, api_client: AsyncClient, params, quantity
+    ):
+        response = await api_client.get(
+            "api/v1/dynamics",
+            params={"start": date(2024, 10, 1), "end": date(2024, 10, 6)} | params,
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()["playload"]) == quantity
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_dynamics_cursor_pagination(self, api_client: AsyncClient):
+        params = {"start": date(2024, 10, 1), "end": date(2024, 10, 6), "per_page": 3}
+        pages = []
+
+        response = await api_client.get("api/v1/dynamics", params=params | {"page": 0})
+        pages.append(response.json())
+        while pages[-1]["next_cursor"]:
+            response = await api_client.get(
+                "api/v1/dynamics", params=params | {"cursor": pages[-1]["next_cursor"]}
+            )
+            pages.append(response.json())
+
+        ids = [row["id"] for page in pages for row in page["playload"]]
+        dates = [row["date"] for page in pages for row in page["playload"]]
+        assert [len(page["playload"]) for page in pages] == [3, 3, 1]
+        assert sorted(ids) == sorted(data["id"] for data in TEST_SPIMEX_DATA)
+        assert dates == sorted(dates, reverse=True)
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_dynamics_cache_key(self, api_client: AsyncClient):
+        params = {"start": date(2024, 10, 1), "end": date(2024, 10, 6)}
+
+        miss = await api_client.get("api/v1/dynamics", params=params)
+        hit = await api_client.get(
+            "api/v1/dynamics", params=params | {"per_page": 5, "format": "json"}
+        )
+
+        assert miss.headers["X-FastAPI-Cache"] == "MISS"
+        assert hit.headers["X-FastAPI-Cache"] == "HIT"
+        assert hit.content == miss.content
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_trading_results_not_modified(self, api_client: AsyncClient):
+        response = await api_client.get("api/v1/trading-results")
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        by_etag = await api_client.get(
+            "api/v1/trading-results", headers={"If-None-Match": etag}
+        )
+        by_date = await api_client.get(
+            "api/v1/trading-results", headers={"If-Modified-Since": last_modified}
+        )
+
+        assert by_etag.status_code == by_date.status_code == 304
+        assert by_etag.content == by_date.content == b""
+        assert by_etag.headers["ETag"] == etag
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_dynamics_summary(self, api_client: AsyncClient, test_session):
+        dates = {data["date"] for data in TEST_SPIMEX_DATA}
+        await DailySummaryRepository(test_session).refresh(list(dates))
+        params = {"start": min(dates), "end": max(dates)}
+
+        summary = await api_client.get("api/v1/dynamics/summary", params=params)
+        dynamics = await api_client.get("api/v1/dynamics", params=params)
+
+        assert summary.status_code == 200
+        rows = summary.json()["playload"]
+        for metric in ("volume", "total", "count"):
+            assert sum(row[metric] for row in rows) == sum(
+                row[metric] for row in dynamics.json()["playload"]
+            )
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_dynamics_summary_rejects_cursor(self, api_client: AsyncClient):
+        params = {"start": date(2024, 10, 1), "end": date(2024, 10, 7)}
+        dynamics = await api_client.get(
+            "api/v1/dynamics", params=params | {"page": 0, "per_page": 1}
+        )
+        cursor = dynamics.json()["next_cursor"]
+
+        summary = await api_client.get(
+            "api/v1/dynamics/summary", params=params | {"cursor": cursor}
+        )
+
+        assert summary.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "params, headers, media_type, lines",
+        [
+            ({"format": "ndjson"}, {}, "application/x-ndjson", 7),
+            ({}, {"Accept": "application/x-ndjson"}, "application/x-ndjson", 7),
+            ({"format": "csv"}, {}, "text/csv", 8),
+        ],
+    )
+    async def test_get_dynamics_streaming(
+        self, api_client: AsyncClient, params, headers, media_type, lines
+    ):
+        response = await api_client.get(
+            "api/v1/dynamics",
+            params={"start": date(2024, 10, 1), "end": date(2024, 10, 6)} | params,
+            headers=headers,
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(media_type)
+        assert len(response.text.splitlines()) == lines
+
+    @pytest.mark.asyncio
+    async def test_get_dynamics_invalid_cursor(self, api_client: AsyncClient):
+        response = await api_client.get(
+            "api/v1/dynamics",
+            params={
+                "start": date(2024, 10, 1),
+                "end": date(2024, 10, 6),
+                "cursor": "x",
+            },
+        )
+
+        assert response.status_code == 400
+
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
         "id, status",
@@ -118,3 +276,45 @@ class TestSpimexEndpoind:
 
         data = response.json()
         assert response.status_code == status
+
+    @pytest.mark.parametrize(
+        "kind, prefix, ids",
+        [
+            ("oil-ids", "S", ["SEVEN", "SIX"]),
+            ("delivery-bases", "T", ["THREE", "TWO"]),
+            ("products", "TEST_F", ["TEST_FIVE", "TEST_FOUR"]),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_get_reference_data(self, api_client: AsyncClient, kind, prefix, ids):
+        response = await api_client.get(
+            f"api/v1/reference/{kind}", params={"prefix": prefix}
+        )
+
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()["playload"]] == ids
+
+    @pytest.mark.usefixtures("fastapi_cache")
+    @pytest.mark.asyncio
+    async def test_get_spimex_trading_results_batch(self, api_client: AsyncClient):
+        found = "2ea8b7f5-fef5-4304-bcb3-119406210858"
+        missing = "b7817a5d-eba6-43ea-97d9-e93e7359e61a"
+
+        response = await api_client.get(
+            "api/v1/batch", params={"ids": [found, missing, found]}
+        )
+
+        data = response.json()
+        assert response.status_code == 200
+        assert [row["id"] for row in data["playload"]] == [found]
+        assert data["missing"] == [missing]
+
+    @pytest.mark.asyncio
+    async def test_get_spimex_trading_results_batch_limit(
+        self, api_client: AsyncClient
+    ):
+        ids = [str(uuid4()) for _ in range(settings.api.BATCH_MAX_IDS + 1)]
+
+        response = await api_client.get("api/v1/batch", params={"ids": ids})
+
+        assert response.status_code == 422
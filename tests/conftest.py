@@ -15,7 +15,8 @@ from tests.fake_data import TEST_SPIMEX_DATA, TEST_EXCEL_DATA
 from src.database import get_async_session
 from src.config import settings
 from src.main import app
-from src.models import Base, SpimexTradingResults
+from src.models import Base, SpimexTradingResults, TradingDay
+from src.utils import cache
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +58,10 @@ async def prepare_db():
                 logger.error(f"Error inserting test: {e}")
                 await session.rollback()
                 logger.info("Rolled back transaction.")
+        session.add_all(
+            TradingDay(date=day) for day in {data["date"] for data in TEST_SPIMEX_DATA}
+        )
+        await session.commit()
     async with engine_test.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info("Database tables created successfully.")
@@ -79,8 +84,12 @@ async def api_client() -> AsyncGenerator[AsyncClient, None]:
 
 
 @pytest.fixture
-def fastapi_cache():
+def fastapi_cache(monkeypatch):
+    FastAPICache.reset()
     FastAPICache.init(InMemoryBackend())
+    monkeypatch.setattr(cache, "data_versions", cache.DataVersions())
+    cache._flights.clear()
+    cache._revalidations.clear()
     yield
 
 
@@ -104,3 +113,13 @@ def excel_file():
         df.to_excel(writer, index=False, sheet_name="Sheet1")
 
     return excel_buffer
+
+
+@pytest.fixture
+def bulletin_file():
+    df = pd.DataFrame(TEST_EXCEL_DATA)
+    bulletin_buffer = BytesIO()
+    with pd.ExcelWriter(bulletin_buffer) as writer:
+        df.to_excel(writer, index=False, sheet_name="Sheet1", startrow=6)
+
+    return bulletin_buffer
@@ -0,0 +1,377 @@
+import asyncio
+from datetime import date, datetime
+
+import orjson
+import pytest
+from fastapi import BackgroundTasks, Depends, FastAPI
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import ASGITransport, AsyncClient
+from src.api.v1.routers.spimex_trading import get_dynamics
+from src.repositories import SpimexRepository
+from src.schemas import TradingFilters
+from src.utils.cache import (
+    DATA_VERSIONS_KEY,
+    DataVersions,
+    _claim_revalidation,
+    _etag,
+    _etag_matches,
+    _http_date,
+    _is_stale,
+    _not_modified_since,
+    _revalidate,
+    bump_data_version,
+    cache,
+    get_data_versions,
+    key_builder,
+    single_flight,
+)
+from src.utils.encoders import ORJSONCoder
+from src.utils.tiered_cache import LRUCache, TieredBackend
+from src.utils.warmer import make_filters
+
+
+async def build_key(filters: TradingFilters, **kwargs) -> str:
+    return await key_builder(
+        get_dynamics,
+        "test",
+        args=(),
+        kwargs={
+            "start": date(2024, 10, 1),
+            "end": date(2024, 10, 6),
+            "format": "json",
+            "sp_filters": filters,
+            "spimex_repo": SpimexRepository(session=None),
+        }
+        | kwargs,
+    )
+
+
+@pytest.mark.usefixtures("fastapi_cache")
+class TestKeyBuilder:
+
+    @pytest.mark.asyncio
+    async def test_key_ignores_dependencies_and_defaults(self):
+        key = await build_key(make_filters())
+
+        assert key == await build_key(make_filters(per_page=5))
+        assert key != await build_key(make_filters(oil_id=["A100"]))
+        assert await build_key(make_filters(oil_id=["A592", "A100"])) == (
+            await build_key(make_filters(oil_id=["A100", "A592", "A100"]))
+        )
+        assert key != await build_key(make_filters(page=0))
+        assert key != await build_key(make_filters(), end=date(2024, 10, 7))
+
+    @pytest.mark.asyncio
+    async def test_key_depends_on_data_version(self):
+        key = await build_key(make_filters())
+        trading_results_key = await key_builder(
+            get_dynamics, "test", args=(), kwargs={}
+        )
+
+        await bump_data_version([date(2024, 10, 7)])
+
+        assert key == await build_key(make_filters())
+        assert key != await build_key(make_filters(), end=date(2024, 10, 7))
+        assert trading_results_key != await key_builder(
+            get_dynamics, "test", args=(), kwargs={}
+        )
+
+        await bump_data_version([date(2024, 10, 3)])
+
+        assert key != await build_key(make_filters())
+
+    @pytest.mark.asyncio
+    async def test_data_versions_survive_clear(self):
+        await bump_data_version([date(2024, 10, 3)])
+        key = await build_key(make_filters())
+
+        await FastAPICache.clear()
+
+        assert await get_data_versions() == {"2024-10-03": 1}
+        assert key == await build_key(make_filters())
+
+
+@pytest.mark.usefixtures("fastapi_cache")
+class TestDataVersions:
+
+    @pytest.fixture
+    def redis(self, mocker):
+        redis = mocker.AsyncMock()
+        redis.hgetall.return_value = {
+            b"": b"2",
+            b"2024-10-03": b"1",
+            b"2024-10-07": b"2",
+        }
+        redis.hget.return_value = b"2"
+        mocker.patch.object(FastAPICache.get_backend(), "redis", redis, create=True)
+        return redis
+
+    @pytest.mark.asyncio
+    async def test_checks_sequence(self, redis):
+        versions = DataVersions()
+        week = [date(2024, 10, 1), date(2024, 10, 5)]
+
+        assert await versions.latest() == 2
+        assert await versions.latest(week) == 1
+        assert redis.hgetall.await_count == 1
+        assert redis.hget.await_count == 1
+
+        redis.hget.return_value = b"3"
+        redis.hgetall.return_value |= {b"": b"3", b"2024-10-04": b"3"}
+        assert await versions.latest(week) == 3
+        assert redis.hgetall.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_reloads_on_invalidation_while_listening(self, mocker, redis):
+        mocker.patch.object(FastAPICache.get_backend(), "listening", True, create=True)
+        versions = DataVersions()
+
+        assert await versions.get() == {"2024-10-03": 1, "2024-10-07": 2}
+        versions.invalidate(key="other")
+        assert await versions.latest() == 2
+        assert redis.hgetall.await_count == 1
+        redis.hget.assert_not_awaited()
+
+        versions.invalidate(key=DATA_VERSIONS_KEY)
+        assert await versions.latest() == 2
+        assert redis.hgetall.await_count == 2
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_coalesces_concurrent_calls(self):
+        cached = []
+
+        async def call():
+            await asyncio.sleep(0.01)
+            cached.append(object())
+            return cached[0]
+
+        results = await asyncio.gather(
+            *(single_flight("flight", call) for _ in range(5))
+        )
+
+        assert len(cached) == 1
+        assert all(result is cached[0] for result in results)
+
+    @pytest.mark.asyncio
+    async def test_waiters_share_failure(self):
+        calls = []
+
+        async def call():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("query failed")
+
+        results = await asyncio.gather(
+            *(single_flight("failing", call) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert isinstance(results[0], RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_waiter_takes_over_after_cancellation(self):
+        async def call():
+            await asyncio.sleep(0.01)
+            return "result"
+
+        leader = asyncio.create_task(single_flight("cancelled", call))
+        waiter = asyncio.create_task(single_flight("cancelled", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await waiter == "result"
+        assert leader.cancelled()
+
+    @pytest.mark.asyncio
+    @pytest.mark.usefixtures("fastapi_cache")
+    async def test_waiters_share_result_when_write_fails(self, mocker):
+        calls = []
+        app = FastAPI()
+
+        @app.get("/coalesced")
+        @cache(expire=60, coalesce=True)
+        async def endpoint():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            return {"ok": True}
+
+        mocker.patch.object(
+            FastAPICache.get_backend(), "set", side_effect=ConnectionError
+        )
+        async with AsyncClient(
+            transport=ASGITransport(app), base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.get("/coalesced") for _ in range(3))
+            )
+
+        assert len(calls) == 1
+        assert [response.json() for response in responses] == [{"ok": True}] * 3
+
+
+@pytest.mark.usefixtures("fastapi_cache")
+class TestStaleWhileRevalidate:
+
+    @pytest.mark.asyncio
+    async def test_is_stale(self):
+        backend = FastAPICache.get_backend()
+        await backend.set("swr:fresh", b"value", 120)
+        await backend.set("swr:stale", b"value", 30)
+
+        assert not await _is_stale("swr:fresh", max_stale=60)
+        assert await _is_stale("swr:stale", max_stale=60)
+        assert not await _is_stale("swr:missing", max_stale=60)
+
+    def test_claim_revalidation(self):
+        assert _claim_revalidation("swr:claim", max_stale=60)
+        assert not _claim_revalidation("swr:claim", max_stale=60)
+
+    @pytest.mark.asyncio
+    async def test_revalidate(self, mock_session):
+        backend = FastAPICache.get_backend()
+        await backend.set("swr:revalidate", b"{}", 30)
+        _claim_revalidation("swr:revalidate", max_stale=60)
+
+        async def call():
+            return {"dates": ["2024-10-07"]}
+
+        await _revalidate(
+            "swr:revalidate",
+            call,
+            ORJSONCoder,
+            expire=120,
+            max_stale=60,
+            lock_timeout=None,
+            last_modified=None,
+            repositories=[SpimexRepository(mock_session)],
+        )
+
+        ttl, value = await backend.get_with_ttl("swr:revalidate")
+        assert value == b'{"dates":["2024-10-07"]}'
+        assert ttl > 60
+        assert _claim_revalidation("swr:revalidate", max_stale=60)
+        mock_session.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_revalidation_keeps_request_background_tasks(self, mocker):
+        tasks = []
+
+        def dependency(background_tasks: BackgroundTasks) -> None:
+            background_tasks.add_task(tasks.append, "dependency")
+
+        app = FastAPI()
+
+        @app.get("/swr")
+        @cache(expire=60, max_stale=60)
+        async def endpoint(dependency: None = Depends(dependency)):
+            tasks.append("computed")
+            return {"ok": True}
+
+        mocker.patch("src.utils.cache._is_stale", return_value=True)
+        async with AsyncClient(
+            transport=ASGITransport(app), base_url="http://test"
+        ) as client:
+            response = await client.get("/swr")
+
+        assert response.json() == {"ok": True}
+        assert tasks == ["computed", "dependency", "computed"]
+
+
+class TestConditionalRequests:
+
+    def test_etag_matches(self):
+        etag = _etag("key")
+
+        assert etag.startswith('"') and etag != _etag("other")
+        assert _etag_matches(etag, etag)
+        assert _etag_matches(f'"other", W/{etag}', etag)
+        assert _etag_matches("*", etag)
+        assert not _etag_matches(_etag("other"), etag)
+
+    def test_not_modified_since(self):
+        modified = datetime(2024, 10, 7, 12, 30, 15, 500)
+
+        assert _http_date(modified) == "Mon, 07 Oct 2024 12:30:15 GMT"
+        assert _not_modified_since(modified, _http_date(modified))
+        assert not _not_modified_since(modified, "Mon, 07 Oct 2024 12:30:14 GMT")
+        assert not _not_modified_since(modified, "not a date")
+
+
+class TestLRUCache:
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(max_bytes=8)
+        lru.set("a", b"1234")
+        lru.set("b", b"1234")
+        lru.get("a")
+        lru.set("c", b"1234")
+
+        assert lru.get("b") is None
+        assert lru.get("a") == (-1, b"1234")
+        assert lru.get("c") == (-1, b"1234")
+        assert lru.size == 8
+
+    def test_expires_entries(self, mocker):
+        monotonic = mocker.patch("src.utils.tiered_cache.time.monotonic")
+        monotonic.return_value = 100
+        lru = LRUCache(max_bytes=8)
+        lru.set("a", b"1234", expire=10)
+
+        assert lru.get("a") == (10, b"1234")
+        monotonic.return_value = 110
+        assert lru.get("a") is None
+        assert lru.size == 0
+
+
+class TestTieredBackend:
+
+    @pytest.fixture
+    def backend(self, mocker):
+        return TieredBackend(
+            InMemoryBackend(),
+            mocker.AsyncMock(),
+            channel="test:invalidate",
+            max_bytes=1024,
+            local_ttl=60,
+        )
+
+    @pytest.mark.asyncio
+    async def test_reads_through_tiers(self, backend):
+        await backend.remote.set("tiered:read", b"value", 30)
+
+        assert await backend.get("tiered:read") == b"value"
+        assert await backend.get("tiered:read") == b"value"
+        assert await backend.get("tiered:missing") is None
+        assert backend.stats() == {
+            "local": {"hits": 1, "misses": 2, "entries": 1, "bytes": 5},
+            "remote": {"hits": 1, "misses": 1},
+        }
+
+    @pytest.mark.asyncio
+    async def test_set_publishes_invalidation(self, backend):
+        await backend.set("tiered:set", b"value", 30)
+
+        assert backend.local.get("tiered:set")[1] == b"value"
+        backend.redis.publish.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalidation_from_other_node(self, backend):
+        backend.local.set("tiered:a", b"value")
+        backend.local.set("tiered:b", b"value")
+
+        backend._on_message(
+            orjson.dumps({"node": "other", "namespace": None, "key": "tiered:a"})
+        )
+        assert backend.local.get("tiered:a") is None
+        assert backend.local.get("tiered:b") is not None
+
+        backend._on_message(
+            orjson.dumps({"node": "other", "namespace": "tiered", "key": None})
+        )
+        assert len(backend.local) == 0
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date
+
+import pytest
+from httpx import ConnectError, MockTransport, Request, Response
+
+from src.utils.downloader import SpimexDownloader
+
+
+def make_downloader(handler, **kwargs) -> SpimexDownloader:
+    return SpimexDownloader(transport=MockTransport(handler), backoff=0, **kwargs)
+
+
+class TestSpimexDownloader:
+
+    @pytest.mark.asyncio
+    async def test_download(self):
+        def handler(request: Request) -> Response:
+            assert request.url.path.endswith("oil_xls_20241007162000.xls")
+            return Response(200, content=b"fake file")
+
+        async with make_downloader(handler) as downloader:
+            result = await downloader.download(date(2024, 10, 7))
+
+        assert result.ok
+        assert result.content == b"fake file"
+        assert result.attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_download_missing_bulletin(self):
+        async with make_downloader(lambda request: Response(404)) as downloader:
+            result = await downloader.download(date(2024, 10, 6))
+
+        assert result.ok
+        assert result.content is None
+        assert result.attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_download_retries(self):
+        responses = iter([Response(503), Response(200, content=b"fake file")])
+
+        def handler(request: Request) -> Response:
+            return next(responses)
+
+        async with make_downloader(handler) as downloader:
+            result = await downloader.download(date(2024, 10, 7))
+
+        assert result.ok
+        assert result.content == b"fake file"
+        assert result.attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_download_fails_after_retries(self):
+        def handler(request: Request) -> Response:
+            raise ConnectError("connection refused", request=request)
+
+        async with make_downloader(handler, retries=2) as downloader:
+            result = await downloader.download(date(2024, 10, 7))
+
+        assert not result.ok
+        assert result.content is None
+        assert result.attempts == 3
+        assert "ConnectError" in result.error
+
+    @pytest.mark.asyncio
+    async def test_download_concurrency(self):
+        in_flight, max_in_flight = 0, 0
+
+        async def handler(request: Request) -> Response:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return Response(200, content=b"fake file")
+
+        async with make_downloader(handler, concurrency=2) as downloader:
+            results = await asyncio.gather(
+                *(downloader.download(date(2024, 10, day)) for day in range(1, 8))
+            )
+
+        assert all(result.ok for result in results)
+        assert max_in_flight == 2
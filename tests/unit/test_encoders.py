@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from uuid import UUID
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from src.schemas import LastTradingResultsDates, TradingResultsList
+from src.utils.encoders import ORJSONCoder
+from tests.fake_data import TEST_SPIMEX_DATA
+
+
+class TestORJSONCoder:
+
+    def test_encode_model(self):
+        trading = TEST_SPIMEX_DATA[0] | {
+            "id": UUID(TEST_SPIMEX_DATA[0]["id"]),
+            "created_on": datetime(2024, 10, 10, 12),
+            "updated_on": datetime(2024, 10, 10, 12),
+        }
+        value = TradingResultsList(playload=[trading])
+
+        encoded = ORJSONCoder.encode(value)
+
+        assert orjson.loads(encoded) == value.model_dump(mode="json")
+
+    def test_encode_response(self):
+        response = ORJSONResponse({"dates": ["2024-10-06"]})
+
+        assert ORJSONCoder.encode(response) == response.body
+
+    def test_decode_as_type_returns_encoded_bytes(self):
+        encoded = ORJSONCoder.encode(
+            LastTradingResultsDates(dates=[date(2024, 10, 6), date(2024, 10, 5)])
+        )
+
+        response = ORJSONCoder.decode_as_type(encoded, type_=None)
+
+        assert response.body == encoded
+        assert response.media_type == "application/json"
+        assert ORJSONCoder.decode(encoded) == {"dates": ["2024-10-06", "2024-10-05"]}
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.utils.cache import bump_data_version, get_data_versions
+from src.utils.reference_index import ReferenceIndex
+
+ROWS = [
+    {
+        "oil_id": oil_id,
+        "delivery_basis_id": basis_id,
+        "delivery_basis_name": f"{basis_id} name",
+        "exchange_product_id": f"{oil_id}{basis_id}060F",
+        "exchange_product_name": f"{oil_id} product",
+    }
+    for oil_id, basis_id in [("A592", "ANK"), ("A100", "BDK"), ("A100", "ANK")]
+]
+
+
+@pytest.mark.usefixtures("fastapi_cache")
+class TestReferenceIndex:
+
+    def test_search(self):
+        index = ReferenceIndex()
+        index.update_rows(ROWS)
+
+        assert index.search("oil_ids") == [("A100", None), ("A592", None)]
+        assert index.search("delivery_bases", "B") == [("BDK", "BDK name")]
+        assert index.search("products", "A100", limit=1) == [
+            ("A100ANK060F", "A100 product")
+        ]
+        assert index.search("products", "B") == []
+
+    @pytest.mark.asyncio
+    async def test_refresh_loads_changed_dates(self, mocker):
+        load = mocker.AsyncMock(return_value=[("A100", "name")])
+        index = ReferenceIndex()
+
+        await index.refresh(load)
+        assert load.await_count == 3
+        load.assert_any_await("oil_id", None, None)
+
+        await index.refresh(load)
+        assert load.await_count == 3
+
+        await bump_data_version([date(2024, 10, 7)])
+        await index.refresh(load)
+        assert load.await_count == 6
+        load.assert_awaited_with(
+            "exchange_product_id", "exchange_product_name", [date(2024, 10, 7)]
+        )
+        assert index.search("products") == [("A100", "name")]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_load_once(self, mocker):
+        async def load(id_column, name_column, dates):
+            await asyncio.sleep(0.01)
+            return []
+
+        load = mocker.AsyncMock(side_effect=load)
+        versions = mocker.patch(
+            "src.utils.reference_index.get_data_versions",
+            side_effect=get_data_versions,
+        )
+        index = ReferenceIndex()
+
+        await asyncio.gather(*(index.refresh(load) for _ in range(3)))
+        assert load.await_count == 3
+        versions.assert_awaited_once()
@@ -1,12 +1,37 @@
-import os
+import asyncio
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date, datetime, timedelta
+from io import BytesIO
+from uuid import uuid4
 
 import pytest
 import pandas as pd
-from httpx import AsyncClient
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql
 
-from src.repositories import SpimexRepository
+from benchmarks.transform import iterrows_transform
+from src.models import (
+    SpimexTradingResults,
+    IngestionLog,
+    IngestionStatus,
+    TradingDay,
+)
+from src.repositories import (
+    SpimexRepository,
+    IngestionLogRepository,
+    TradingDayRepository,
+)
+from src.repositories.spimex_trading import (
+    get_parse_pool,
+    next_prefix,
+    shutdown_parse_pool,
+)
+from src.utils.downloader import DownloadResult, SpimexDownloader
 from src.utils.repository import SqlAlchemyRepository
+from src.utils.trading_days import RecentTradingDays
 
 
 class TestSpimexRepository:
@@ -25,17 +50,44 @@ class TestSpimexRepository:
         assert result == "mocked_result"
 
     @pytest.mark.asyncio
-    async def test_get_last_trading_dates(self, mock_session, mocker):
-        mocker.patch.object(
+    async def test_get_tradings(self, mock_session, mocker):
+        found, missing = uuid4(), uuid4()
+        get_by_ids = mocker.patch.object(
             SqlAlchemyRepository,
-            "get_grouped_query_with_limit",
-            return_value=["2024-10-04", "2024-10-03"],
+            "get_by_ids",
+            return_value=[SpimexTradingResults(id=found)],
+        )
+
+        repository = SpimexRepository(mock_session)
+        result, not_found = await repository.get_tradings([found, missing])
+
+        get_by_ids.assert_awaited_once_with([found, missing])
+        assert [trading.id for trading in result] == [found]
+        assert not_found == [missing]
+
+    @pytest.mark.asyncio
+    async def test_get_last_trading_dates(self, mock_session, mocker):
+        get_last = mocker.patch.object(
+            TradingDayRepository,
+            "get_last",
+            return_value=[date(2024, 10, 4), date(2024, 10, 3), date(2024, 10, 2)],
+        )
+        mocker.patch(
+            "src.repositories.spimex_trading.recent_trading_days",
+            RecentTradingDays(size=3),
         )
 
         repository = SpimexRepository(mock_session)
 
-        result = await repository.get_last_trading_dates(2)
-        assert result == ["2024-10-04", "2024-10-03"]
+        assert await repository.get_last_trading_dates(2) == [
+            date(2024, 10, 4),
+            date(2024, 10, 3),
+        ]
+        assert await repository.get_last_trading_dates(1) == [date(2024, 10, 4)]
+        get_last.assert_awaited_once_with(3)
+
+        await repository.get_last_trading_dates(5)
+        get_last.assert_awaited_with(5)
 
     @pytest.mark.asyncio
     async def test_get_dates(self, mock_session):
@@ -46,24 +98,105 @@ class TestSpimexRepository:
 
         assert len(dates) == 3
 
+    def test_next_prefix(self):
+        assert next_prefix("A592") == "A593"
+        assert next_prefix("A59" + chr(sys.maxunicode)) == "A5:"
+        assert next_prefix(chr(sys.maxunicode)) is None
+        assert next_prefix("") is None
+
+    def test_prefix_predicate(self, mock_session):
+        repository = SpimexRepository(mock_session)
+        predicate = repository._prefix_predicate("A5_9").compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+
+        assert str(predicate) == (
+            "spimex_trading_results.exchange_product_id >= 'A5_9' AND "
+            "(spimex_trading_results.exchange_product_id LIKE 'A5/_9' || '%%' "
+            "ESCAPE '/') AND spimex_trading_results.exchange_product_id < 'A5_:'"
+        )
+
+    def test_buffer(self, mock_session):
+        repository = SpimexRepository(mock_session)
+        file = repository._buffer(b"fake file")
+
+        assert isinstance(file, BytesIO)
+        assert file.read() == b"fake file"
+
+    def test_buffer_spills_large_payload(self, mocker, mock_session):
+        mocker.patch("src.repositories.spimex_trading.settings.ingest.SPILL_SIZE", 4)
+
+        repository = SpimexRepository(mock_session)
+        with repository._buffer(b"fake file") as file:
+            assert not isinstance(file, BytesIO)
+            assert file.read() == b"fake file"
+
     @pytest.mark.asyncio
-    async def test_download_and_save(self, mocker, mock_session):
-        mock_response = mocker.Mock()
-        mock_response.status_code = 200
-        mock_response.content = b"fake file"
+    async def test_download_stage_backpressure(self, mocker, mock_session):
+        mocker.patch(
+            "src.repositories.spimex_trading.settings.ingest.DOWNLOAD_CONCURRENCY", 2
+        )
+        downloader = mocker.Mock(SpimexDownloader)
+        downloader.download.side_effect = lambda day: DownloadResult(
+            day, content=b"fake file"
+        )
+        dates = [date(2024, 10, day) for day in range(1, 11)]
+        parse_queue = asyncio.Queue(maxsize=1)
 
-        mock_client = mocker.AsyncMock(spec=AsyncClient)
-        mock_client.get = mocker.AsyncMock(return_value=mock_response)
+        repository = SpimexRepository(mock_session)
+        stage = asyncio.create_task(
+            repository._download_stage(dates, downloader, parse_queue, {})
+        )
+        await asyncio.sleep(0.01)
+
+        # One file in the queue and one waiting on it per worker.
+        assert downloader.download.await_count == 3
 
+        downloaded = []
+        while (item := await parse_queue.get()) is not None:
+            downloaded.append(item[0]["date"])
+        await stage
+        assert sorted(downloaded) == dates
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("spill_size", [0, 1])
+    async def test_parse_stage(self, mocker, bulletin_file, mock_session, spill_size):
+        mocker.patch(
+            "src.repositories.spimex_trading.settings.ingest.SPILL_SIZE", spill_size
+        )
         repository = SpimexRepository(mock_session)
-        test_date = date(2024, 10, 7)
-        await repository._download_and_save(test_date, mock_client)
+        file = repository._buffer(bulletin_file.getvalue())
+        entry = {"date": date(2024, 10, 7), "status": IngestionStatus.NO_DATA}
+        parse_queue, insert_queue = asyncio.Queue(), asyncio.Queue()
+        for item in [(entry, file), None]:
+            await parse_queue.put(item)
 
-        assert os.path.exists(f"{test_date}_spimex_data.xls") == True
-        with open(f"{test_date}_spimex_data.xls") as file:
-            assert file.read() == "fake file"
+        await repository._parse_stage(parse_queue, insert_queue, {"parse": 0.0})
+        shutdown_parse_pool()
 
-        os.remove(f"{test_date}_spimex_data.xls")
+        entry, rows = await insert_queue.get()
+        assert entry["status"] == IngestionStatus.LOADED
+        assert entry["rows"] == len(rows) == 4
+        assert file.closed
+        assert await insert_queue.get() is None
+
+    @pytest.mark.asyncio
+    async def test_parse_stage_replaces_broken_pool(self, mocker, mock_session):
+        pool = mocker.Mock(ProcessPoolExecutor)
+        pool.submit.side_effect = BrokenProcessPool
+        mocker.patch("src.repositories.spimex_trading._parse_pool", pool)
+        entry = {"date": date(2024, 10, 7), "status": IngestionStatus.NO_DATA}
+        parse_queue, insert_queue = asyncio.Queue(), asyncio.Queue()
+        for item in [(entry, BytesIO(b"fake file")), None]:
+            await parse_queue.put(item)
+
+        repository = SpimexRepository(mock_session)
+        await repository._parse_stage(parse_queue, insert_queue, {"parse": 0.0})
+
+        assert (await insert_queue.get())[0]["status"] == IngestionStatus.FAILED
+        pool.shutdown.assert_called_once()
+        assert get_parse_pool() is not pool
+        shutdown_parse_pool()
 
     @pytest.mark.asyncio
     async def test_get_necessary_data(self, mocker, excel_file, mock_session):
@@ -85,21 +218,186 @@ class TestSpimexRepository:
         assert df["volume"].dtype == int
 
     @pytest.mark.asyncio
-    async def test_save_to_db(self, mocker, excel_file, test_session):
-        mocker.patch(
-            "src.repositories.spimex_trading.AsyncClient",
-            return_value=mocker.AsyncMock(spec=AsyncClient),
+    async def test_prepare_rows(self, mocker, excel_file, mock_session):
+        mocker.patch("pandas.read_excel", return_value=pd.read_excel(excel_file))
+
+        repository = SpimexRepository(mock_session)
+        df = repository._get_necessary_data("mocked_file.xlsx")
+        rows = repository._prepare_rows(df, date(2024, 10, 7))
+
+        assert len(rows) == 4
+        assert rows[0] == {
+            "exchange_product_id": "A001BDK060C",
+            "exchange_product_name": "Бензин (АИ-100-К5), БП Владикавказ (ст. назначения)",
+            "delivery_basis_name": "БП Владикавказ",
+            "volume": 1000,
+            "total": 10,
+            "count": 1,
+            "oil_id": "A001",
+            "delivery_basis_id": "BDK",
+            "delivery_type_id": "C",
+            "date": date(2024, 10, 7),
+        }
+
+    def test_prepare_rows_outpaces_iterrows(self, mock_session):
+        rows_num = 10_000
+        df = pd.DataFrame(
+            {
+                "exchange_product_id": [f"A{i:03d}BDK060C" for i in range(rows_num)],
+                "exchange_product_name": ["SOME_PRODUCT"] * rows_num,
+                "delivery_basis_name": ["SOME_NAME"] * rows_num,
+                "volume": list(range(rows_num)),
+                "total": list(range(rows_num)),
+                "count": [1] * rows_num,
+            }
         )
+        repository = SpimexRepository(mock_session)
+
+        started = time.perf_counter()
+        expected = iterrows_transform(df, date(2024, 10, 7))
+        iterrows_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = repository._prepare_rows(df, date(2024, 10, 7))
+        vectorized_elapsed = time.perf_counter() - started
+
+        assert rows == expected
+        assert vectorized_elapsed * 5 < iterrows_elapsed
+
+    @pytest.mark.asyncio
+    async def test_save_to_db(self, mocker, bulletin_file, test_session):
         mocker.patch.object(
             SpimexRepository, "_get_dates", return_value=[date(2024, 10, 7)]
         )
         mocker.patch.object(
-            SpimexRepository, "_download_and_save", new_callable=mocker.AsyncMock
+            SpimexDownloader,
+            "download",
+            new_callable=mocker.AsyncMock,
+            return_value=DownloadResult(
+                date(2024, 10, 7), content=bulletin_file.getvalue()
+            ),
         )
-        mocker.patch("os.path.exists", return_value=True)
-        mocker.patch("pandas.read_excel", return_value=pd.read_excel(excel_file))
-        mocker.patch("os.remove")
+        bump_data_version = mocker.patch(
+            "src.repositories.spimex_trading.bump_data_version"
+        )
+
+        repository = SpimexRepository(test_session)
+        timings = await repository.save_to_db(date(2024, 10, 7))
+
+        result = await test_session.execute(
+            select(SpimexTradingResults).where(
+                SpimexTradingResults.date == date(2024, 10, 7)
+            )
+        )
+        assert len(result.scalars().all()) == 4
+        assert timings.keys() == {"download", "parse", "insert", "total", "loaded"}
+        assert timings["loaded"] == 1
+
+        log_entry = await test_session.get(IngestionLog, date(2024, 10, 7))
+        assert log_entry.status == IngestionStatus.LOADED
+        assert log_entry.rows == 4
+        assert await test_session.get(TradingDay, date(2024, 10, 7)) is not None
+        bump_data_version.assert_awaited_once_with([date(2024, 10, 7)])
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("partitioned, created", [(True, 2), (False, 0)])
+    async def test_ensure_partitions(self, mock_session, partitioned, created):
+        mock_session.scalar.return_value = partitioned
+
+        repository = SpimexRepository(mock_session)
+        await repository._ensure_partitions(
+            [date(2024, 10, 7), date(2024, 10, 1), date(2024, 9, 30)]
+        )
+
+        assert mock_session.execute.await_count == created
+
+    @pytest.mark.asyncio
+    async def test_get_pending_dates(self, mocker, test_session):
+        mocker.patch.object(
+            SpimexRepository,
+            "_get_dates",
+            return_value=[date(2024, 9, 4), date(2024, 9, 3), date(2024, 9, 2)],
+        )
+        ingestion_log = IngestionLogRepository(test_session)
+        for log_date, status in [
+            (date(2024, 9, 2), IngestionStatus.LOADED),
+            (date(2024, 9, 3), IngestionStatus.FAILED),
+        ]:
+            await ingestion_log.record(
+                {"date": log_date, "status": status, "rows": 0, "checksum": None}
+            )
+        await test_session.commit()
+
+        repository = SpimexRepository(test_session)
+        dates = await repository._get_pending_dates(date(2024, 9, 1))
+
+        assert dates == [date(2024, 9, 4), date(2024, 9, 3)]
+
+    @pytest.mark.asyncio
+    async def test_bulk_save(self, test_session):
+        bulk_date = date(2024, 9, 1)
+        rows = [
+            {
+                "exchange_product_id": f"A00{i}BDK060C",
+                "exchange_product_name": "SOME_PRODUCT",
+                "oil_id": f"A00{i}",
+                "delivery_basis_id": "BDK",
+                "delivery_basis_name": "SOME_NAME",
+                "delivery_type_id": "C",
+                "volume": 10,
+                "total": 100,
+                "count": 1,
+                "date": bulk_date,
+            }
+            for i in range(3)
+        ]
+
+        repository = SpimexRepository(test_session)
+        saved = await repository.bulk_save(rows)
+
+        result = await test_session.execute(
+            select(SpimexTradingResults).where(SpimexTradingResults.date == bulk_date)
+        )
+        assert saved == 3
+        assert len(result.scalars().all()) == 3
+
+        await test_session.execute(
+            delete(SpimexTradingResults).where(SpimexTradingResults.date == bulk_date)
+        )
+        await test_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_upsert_all(self, test_session):
+        upsert_date = date(2024, 9, 5)
+        row = {
+            "exchange_product_id": "A001BDK060C",
+            "exchange_product_name": "SOME_PRODUCT",
+            "oil_id": "A001",
+            "delivery_basis_id": "BDK",
+            "delivery_basis_name": "SOME_NAME",
+            "delivery_type_id": "C",
+            "volume": 10,
+            "total": 100,
+            "count": 1,
+            "date": upsert_date,
+        }
 
         repository = SpimexRepository(test_session)
-        await repository.save_to_db(date(2024, 10, 7))
-        os.remove.assert_called_once_with("2024-10-07_spimex_data.xls")
+        for volume in (10, 10, 20):
+            await repository.upsert_all(
+                [row | {"volume": volume}],
+                index_elements=["date", "exchange_product_id"],
+                batch_size=100,
+            )
+
+        result = await test_session.execute(
+            select(SpimexTradingResults.volume).where(
+                SpimexTradingResults.date == upsert_date
+            )
+        )
+        assert result.scalars().all() == [20]
+
+        await test_session.execute(
+            delete(SpimexTradingResults).where(SpimexTradingResults.date == upsert_date)
+        )
+        await test_session.commit()
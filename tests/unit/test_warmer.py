@@ -0,0 +1,119 @@
+from datetime import date
+
+import pytest
+from fastapi_cache import FastAPICache
+
+from src.repositories import SpimexRepository
+from src.utils import cache, warmer
+from src.utils.warmer import get_top_filters, make_filters, record_access, warm_cache
+
+
+class FakePipeline:
+    def __init__(self, store: dict):
+        self.store = store
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def zincrby(self, key, amount, member):
+        self.commands.append(("zincrby", key, amount, member))
+
+    def expire(self, key, seconds):
+        self.commands.append(("expire", key, seconds))
+
+    def zrange(self, key, start, end, withscores):
+        self.commands.append(("zrange", key))
+
+    async def execute(self):
+        results = []
+        for command, key, *args in self.commands:
+            if command == "zincrby":
+                amount, member = args
+                members = self.store.setdefault(key, {})
+                members[member] = members.get(member, 0) + amount
+            if command == "zrange":
+                results.append(list(self.store.get(key, {}).items()))
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction: bool):
+        return FakePipeline(self.store)
+
+
+@pytest.fixture
+def redis(mocker):
+    redis = FakeRedis()
+    mocker.patch.object(FastAPICache.get_backend(), "redis", redis, create=True)
+    return redis
+
+
+@pytest.fixture
+def repository(mocker):
+    mocker.patch.object(warmer, "async_session_maker", mocker.MagicMock())
+    for method, result in [
+        ("get_last_trading_dates", [date(2024, 10, 7)]),
+        ("get_trading_results", []),
+        ("get_dynamics", []),
+    ]:
+        mocker.patch.object(
+            SpimexRepository, method, new_callable=mocker.AsyncMock, return_value=result
+        )
+    return SpimexRepository
+
+
+@pytest.mark.usefixtures("fastapi_cache")
+class TestWarmer:
+
+    def test_make_filters(self):
+        filters = make_filters(oil_id=["A592", "A100", "A592"])
+
+        assert filters.oil_id == ["A100", "A592"]
+        assert filters.delivery_basis_id is None
+        assert filters.per_page == 100
+        assert filters.limit is None
+
+    @pytest.mark.asyncio
+    async def test_top_filters(self, redis):
+        for oil_id, basis_id in [
+            (["A100"], ["ANK"]),
+            (["A100"], ["ANK"]),
+            (["A592"], None),
+            (["A100"], ["ANK"]),
+            (["A592"], None),
+            (["DTZ5"], ["NVY"]),
+        ]:
+            await record_access(make_filters(oil_id=oil_id, delivery_basis_id=basis_id))
+        await record_access(make_filters())
+
+        top_filters = await get_top_filters(limit=2, days=7)
+
+        assert top_filters == [(["A100"], ["ANK"]), (["A592"], None)]
+        assert list(redis.store) == [warmer._access_key(date.today())]
+
+    @pytest.mark.asyncio
+    async def test_top_filters_without_redis(self):
+        assert await get_top_filters(limit=2, days=7) == []
+
+    @pytest.mark.asyncio
+    async def test_warm_cache(self, mocker, repository):
+        assert await warm_cache() == 4
+        assert repository.get_trading_results.await_count == 1
+        assert repository.get_dynamics.await_count == 2
+
+        assert await warm_cache() == 4
+        assert repository.get_trading_results.await_count == 1
+
+        # Stale entries are recomputed by the warmer itself.
+        mocker.patch.object(cache, "_is_stale", return_value=True)
+        assert await warm_cache() == 4
+        assert repository.get_trading_results.await_count == 2
+        assert repository.get_dynamics.await_count == 2
+        assert cache._revalidations == {}